@@ -0,0 +1,218 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+import metrics
+
+# Concurrent predictions per domain, and how many more may wait for a slot (0 slots disables admission control)
+ADMISSION_SLOTS = int(os.getenv("ADMISSION_SLOTS", "16"))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "64"))
+# Slots per domain that bulk (batch) requests may hold, so interactive traffic always has room
+ADMISSION_BULK_SLOTS = int(os.getenv("ADMISSION_BULK_SLOTS", str(max(1, ADMISSION_SLOTS // 4))))
+# Waiting bulk requests are bounded separately, so they never fill the interactive queue
+ADMISSION_BULK_QUEUE = int(os.getenv("ADMISSION_BULK_QUEUE", str(max(1, ADMISSION_QUEUE // 4))))
+# How long a request may wait for a slot before it is shed
+ADMISSION_INTERACTIVE_WAIT_S = float(os.getenv("ADMISSION_INTERACTIVE_WAIT_S", "2"))
+ADMISSION_BULK_WAIT_S = float(os.getenv("ADMISSION_BULK_WAIT_S", "30"))
+
+# Per-user token buckets: requests/s for interactive calls, texts/s for batches (0 rate disables)
+USER_RATE_PER_S = float(os.getenv("USER_RATE_PER_S", "10"))
+USER_BURST = float(os.getenv("USER_BURST", "20"))
+USER_BULK_RATE_PER_S = float(os.getenv("USER_BULK_RATE_PER_S", "200"))
+USER_BULK_BURST = float(os.getenv("USER_BULK_BURST", "2000"))
+USER_BUCKETS_MAX = int(os.getenv("USER_BUCKETS_MAX", "100000"))
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+ADMISSION_REJECTED = metrics.register(
+    metrics.Counter("trustlens_admission_rejected_total", "Prediction requests shed by admission control")
+)
+ADMISSION_WAIT_SECONDS = metrics.register(
+    metrics.Histogram("trustlens_admission_wait_seconds", "Time spent waiting for an inference slot")
+)
+
+
+def _reject(code, detail, retry_after, **labels):
+    ADMISSION_REJECTED.inc(**labels)
+    return HTTPException(status_code=code, detail=detail, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class TokenBuckets:
+    """Per-key token buckets, least recently used keys dropped past `max_keys`."""
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, cost=1.0):
+        """Spend `cost` tokens; return 0 on success, else the seconds until they will be available."""
+        if self.rate <= 0:
+            return 0.0
+        # A request larger than the burst only has to wait for a full bucket
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class DomainGate:
+    """Bounded concurrency for one domain with two priority lanes.
+
+    A freed slot goes to the oldest interactive waiter first; bulk waiters
+    only get one while fewer than `bulk_slots` bulk requests are running.
+    Each lane has its own queue bound, so queued bulk requests never shed
+    interactive ones.
+    """
+
+    def __init__(self, name, slots, max_queue, bulk_slots, bulk_queue):
+        self.name = name
+        self.slots = slots
+        self.max_queue = {INTERACTIVE: max_queue, BULK: bulk_queue}
+        self.bulk_slots = min(bulk_slots, slots)
+        self._lock = threading.Lock()
+        self._active = {INTERACTIVE: 0, BULK: 0}
+        self._waiting = {INTERACTIVE: deque(), BULK: deque()}
+        self._service_s = 0.1  # EWMA of slot hold time, for Retry-After hints
+
+    def _can_start(self, lane):
+        if sum(self._active.values()) >= self.slots:
+            return False
+        return lane == INTERACTIVE or self._active[BULK] < self.bulk_slots
+
+    def _grant_next(self):
+        for lane in (INTERACTIVE, BULK):
+            waiting = self._waiting[lane]
+            while waiting and self._can_start(lane):
+                waiter = waiting.popleft()
+                waiter.granted = True
+                self._active[lane] += 1
+                waiter.event.set()
+
+    def retry_after(self, lane):
+        # Interactive requests only ever wait behind their own lane
+        queued = len(self._waiting[INTERACTIVE]) + (len(self._waiting[BULK]) if lane == BULK else 0)
+        return (queued + 1) * self._service_s / max(1, self.slots)
+
+    def acquire(self, lane, timeout):
+        with self._lock:
+            ahead = self._waiting[INTERACTIVE] if lane == INTERACTIVE else self._waiting[INTERACTIVE] or self._waiting[BULK]
+            if not ahead and self._can_start(lane):
+                self._active[lane] += 1
+                return
+            if len(self._waiting[lane]) >= self.max_queue[lane]:
+                raise _reject(503, f"{self.name} inference queue is full", self.retry_after(lane), domain=self.name, lane=lane, reason="queue_full")
+            waiter = _Waiter()
+            self._waiting[lane].append(waiter)
+
+        waiter.event.wait(timeout)
+        with self._lock:
+            if waiter.granted:
+                return
+            self._waiting[lane].remove(waiter)
+            raise _reject(503, f"{self.name} inference is saturated, try again shortly", self.retry_after(lane), domain=self.name, lane=lane, reason="deadline")
+
+    def release(self, lane, held_s):
+        with self._lock:
+            self._active[lane] -= 1
+            self._service_s = 0.9 * self._service_s + 0.1 * held_s
+            self._grant_next()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": dict(self._active),
+                "queued": {lane: len(w) for lane, w in self._waiting.items()},
+            }
+
+
+class AdmissionController:
+    def __init__(self, domains, slots, max_queue, bulk_slots, bulk_queue, interactive_wait, bulk_wait, user_buckets, bulk_user_buckets):
+        self.enabled = slots > 0
+        self.slots = slots
+        self.max_queue = max_queue + bulk_queue
+        self.gates = {name: DomainGate(name, slots, max_queue, bulk_slots, bulk_queue) for name in domains}
+        self.waits = {INTERACTIVE: interactive_wait, BULK: bulk_wait}
+        self.buckets = {INTERACTIVE: user_buckets, BULK: bulk_user_buckets}
+
+    @contextmanager
+    def admit(self, domain, username, lane=INTERACTIVE, cost=1):
+        """Hold an inference slot for `domain` while the block runs, or raise 429/503 with Retry-After."""
+        wait = self.buckets[lane].take(username, cost)
+        if wait > 0:
+            raise _reject(429, "Rate limit exceeded", wait, domain=domain, lane=lane, reason="quota")
+        if not self.enabled:
+            yield
+            return
+
+        gate = self.gates[domain]
+        started = time.perf_counter()
+        gate.acquire(lane, self.waits[lane])
+        admitted = time.perf_counter()
+        ADMISSION_WAIT_SECONDS.observe(admitted - started, domain=domain, lane=lane)
+        metrics.record_stage(domain, "admission_wait", admitted - started)
+        try:
+            yield
+        finally:
+            gate.release(lane, time.perf_counter() - admitted)
+
+    def thread_demand(self):
+        """Most request threads that can be running or waiting in the gates at once."""
+        return len(self.gates) * (self.slots + self.max_queue) if self.enabled else 0
+
+
+admission = AdmissionController(
+    ["news", "review", "job"],
+    slots=ADMISSION_SLOTS,
+    max_queue=ADMISSION_QUEUE,
+    bulk_slots=ADMISSION_BULK_SLOTS,
+    bulk_queue=ADMISSION_BULK_QUEUE,
+    interactive_wait=ADMISSION_INTERACTIVE_WAIT_S,
+    bulk_wait=ADMISSION_BULK_WAIT_S,
+    user_buckets=TokenBuckets(USER_RATE_PER_S, USER_BURST, USER_BUCKETS_MAX),
+    bulk_user_buckets=TokenBuckets(USER_BULK_RATE_PER_S, USER_BULK_BURST, USER_BUCKETS_MAX),
+)
+
+
+@metrics.register_collector
+def _admission_metrics():
+    lines = [
+        "# HELP trustlens_admission_slots_in_use Inference slots held per domain and lane",
+        "# TYPE trustlens_admission_slots_in_use gauge",
+    ]
+    queued = [
+        "# HELP trustlens_admission_queued Requests waiting for an inference slot",
+        "# TYPE trustlens_admission_queued gauge",
+    ]
+    for name, gate in admission.gates.items():
+        stats = gate.stats()
+        for lane in (INTERACTIVE, BULK):
+            lines.append(f'trustlens_admission_slots_in_use{{domain="{name}",lane="{lane}"}} {stats["active"][lane]}')
+            queued.append(f'trustlens_admission_queued{{domain="{name}",lane="{lane}"}} {stats["queued"][lane]}')
+    return lines + queued
@@ -0,0 +1,46 @@
+import os
+
+# A model directory may hold versions/<version>/ subdirectories plus a CURRENT
+# file naming the active one; without CURRENT the directory itself is served.
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def resolve(base_dir):
+    """Return `(directory, label)` for the active version of the model stored under `base_dir`."""
+    pointer = os.path.join(base_dir, CURRENT_FILE)
+    try:
+        with open(pointer) as f:
+            label = f.read().strip()
+    except FileNotFoundError:
+        return base_dir, "default"
+    path = os.path.join(base_dir, VERSIONS_DIR, label)
+    if not label or not os.path.isdir(path):
+        raise FileNotFoundError(f"{pointer} points at missing version {label!r}")
+    return path, label
+
+
+def activate(base_dir, label):
+    """Atomically point `base_dir` at versions/<label>; running servers pick it up on reload."""
+    if not os.path.isdir(os.path.join(base_dir, VERSIONS_DIR, label)):
+        raise FileNotFoundError(f"No version {label!r} under {base_dir}")
+    tmp = os.path.join(base_dir, f".{CURRENT_FILE}.tmp")
+    with open(tmp, "w") as f:
+        f.write(label + "\n")
+    os.replace(tmp, os.path.join(base_dir, CURRENT_FILE))
+
+
+def memory_usage():
+    """Resident and proportional set size of this process in bytes (PSS splits shared pages between processes)."""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    usage[key.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
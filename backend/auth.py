@@ -1,3 +1,9 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,6 +14,11 @@ SECRET_KEY = "supersecretkey"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Verified-token cache and the dedicated bcrypt executor
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+AUTH_HASH_QUEUE_LIMIT = int(os.getenv("AUTH_HASH_QUEUE_LIMIT", "16"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password, hashed_password):
@@ -25,3 +36,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+
+class HashingBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+# Running plus queued hash jobs; beyond this, callers are turned away instead of piling up
+_hash_slots = threading.BoundedSemaphore(AUTH_HASH_WORKERS + AUTH_HASH_QUEUE_LIMIT)
+
+
+async def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusy()
+    future = _hash_executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    return await _run_hashing(get_password_hash, password)
+
+
+class TokenCache:
+    """Bounded LRU of already-verified token payloads, each kept only until its `exp`."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload
+
+    def put(self, token, payload):
+        expires_at = payload.get("exp")
+        if expires_at is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (float(expires_at), payload)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
+def decode_access_token(token: str):
+    """Return the verified payload of `token`, raising JWTError if it is invalid or expired."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if payload.get("sub") is None:
+        raise JWTError("Token has no subject")
+    token_cache.put(token, payload)
+    return payload
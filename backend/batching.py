@@ -0,0 +1,77 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects concurrent submissions into batches for a single infer function.
+
+    `infer_fn` receives a list of items and must return a list of results in
+    the same order. Each caller of `submit` blocks until its own result is ready;
+    `submit_async` returns a Future instead, and cancelling it before its
+    batch is formed drops the item.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=8, max_wait_ms=5.0, name="batcher"):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # Forked into a worker process: the parent's thread and queue are not ours
+            self._reset()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit_async(self, item):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def submit(self, item):
+        return self.submit_async(item).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Skip items whose caller cancelled while they were queued
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            try:
+                results = self.infer_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from transformers import AutoTokenizer, RobertaConfig, RobertaForSequenceClassification
+
+import predictors
+from inference_backends import TorchRunner
+
+FILLER = (
+    "the a report city council week market team product service company people data year "
+    "price local new official quality delivery customer experience role salary office remote"
+).split()
+SIGNALS = {
+    "news": ["miracle", "secret", "aliens", "cover up", "research", "nasa", "inside source", "study"],
+    "review": ["perfect", "best product ever", "buy now", "AMAZING", "!!!", "life changing"],
+    "job": ["earn", "registration fee", "urgent hiring", "investment", "no experience needed", "₹"],
+}
+LENGTHS = {"short": 12, "medium": 80, "long": 450}
+
+
+def synthetic_corpus(domain, size, seed=0):
+    """Texts of mixed lengths with a sprinkling of rule-triggering phrases."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(size):
+        words = [rng.choice(FILLER) for _ in range(list(LENGTHS.values())[i % len(LENGTHS)])]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SIGNALS[domain]))
+        texts.append(" ".join(words))
+    return texts
+
+
+def tiny_classifier(tokenizer, num_labels):
+    """Randomly initialised 2-layer RoBERTa with the real vocabulary, as a stand-in for the served models."""
+    torch.manual_seed(0)
+    config = RobertaConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=514,
+        num_labels=num_labels,
+    )
+    return TorchRunner(RobertaForSequenceClassification(config).eval())
+
+
+def tiny_review_models(texts):
+    labels = [int(any(s in t for s in SIGNALS["review"])) for t in texts]
+    tfidf = TfidfVectorizer(max_features=5000).fit(texts)
+    rf = RandomForestClassifier(n_estimators=25, max_depth=12, random_state=0).fit(tfidf.transform(texts), labels)
+    return tfidf, rf
+
+
+def measure(fn, items, repeats):
+    fn()  # warm-up
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "items_per_s": round(items / (float(ms.mean()) / 1000), 2),
+        "peak_python_kb": round(peak / 1024, 1),
+    }
+
+
+def build_stages(batch_size, corpus_size):
+    tokenizer = AutoTokenizer.from_pretrained(predictors.NEWS_MODEL_PATH)
+    news = synthetic_corpus("news", corpus_size, seed=1)
+    reviews = synthetic_corpus("review", corpus_size, seed=2)
+    jobs = synthetic_corpus("job", corpus_size, seed=3)
+    news_batch = news[:batch_size]
+
+    runner = tiny_classifier(tokenizer, num_labels=3)
+    encoded = tokenizer(news_batch, return_tensors="pt", truncation=True, max_length=512, padding=True)
+    with torch.no_grad():
+        logits = runner.model(**encoded).logits
+    tfidf, rf = tiny_review_models(reviews)
+    matrix = tfidf.transform(reviews)
+
+    def forward():
+        with torch.no_grad():
+            runner.model(**encoded)
+
+    def fusion():
+        probs = torch.nn.functional.softmax(logits, dim=-1).tolist()
+        return [max(0.0, min(predictors._news_ml_score(p) + 0.15, 1.0)) for p in probs]
+
+    # name -> (callable, items processed per call)
+    return {
+        "tokenize": (lambda: tokenizer(news_batch, return_tensors="pt", truncation=True, max_length=512, padding=True), len(news_batch)),
+        "forward": (forward, len(news_batch)),
+        "softmax_fusion": (fusion, len(news_batch)),
+        "rules_news": (lambda: [predictors.apply_fake_news_rules(t) for t in news], len(news)),
+        "rules_review": (lambda: [predictors.apply_fake_review_rules(t) for t in reviews], len(reviews)),
+        "rules_review_batch": (lambda: predictors.RULES["review"].evaluate_batch(reviews), len(reviews)),
+        "rules_job": (lambda: [predictors.apply_fake_job_rules(t) for t in jobs], len(jobs)),
+        "tfidf_transform": (lambda: tfidf.transform(reviews), len(reviews)),
+        "rf_predict_proba": (lambda: rf.predict_proba(matrix), len(reviews)),
+        "rf_forest_proba": (lambda: predictors._forest_proba(rf, matrix), len(reviews)),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the stages whose p50 latency or throughput is worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        if current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        elif current["items_per_s"] < previous["items_per_s"] * (1 - tolerance):
+            regressions.append(f"{stage}: throughput {previous['items_per_s']:.1f} -> {current['items_per_s']:.1f}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage micro-benchmarks for the predictor pipeline.")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before flagging (0.15 = 15%%)")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--corpus-size", type=int, default=300)
+    parser.add_argument("--stage", action="append", help="Only run the named stage (repeatable)")
+    args = parser.parse_args()
+
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", "1")))
+    stages = build_stages(args.batch_size, args.corpus_size)
+    selected = args.stage or list(stages)
+
+    results = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "batch_size": args.batch_size,
+        "corpus_size": args.corpus_size,
+        "stages": {},
+    }
+    for name in selected:
+        fn, items = stages[name]
+        results["stages"][name] = measure(fn, items, args.repeats)
+        r = results["stages"][name]
+        print(f"{name:<18} p50 {r['p50_ms']:>9.3f} ms  p99 {r['p99_ms']:>9.3f} ms  {r['items_per_s']:>10.1f} items/s")
+    results["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output} (peak RSS {results['max_rss_mb']} MB)")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
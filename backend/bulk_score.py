@@ -0,0 +1,139 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import predictors
+
+BATCH_FUNCTIONS = {
+    "news": predictors.predict_news_batch,
+    "review": predictors.predict_review_batch,
+    "job": predictors.predict_job_batch,
+}
+
+
+def _lines(f, position):
+    # Decoded lines, keeping position[0] at the byte offset just past the last line handed out
+    for line in f:
+        position[0] += len(line)
+        yield line.decode("utf-8")
+
+
+def read_records(path, fmt, text_field, id_field, start=0, offset=0):
+    """Yield (record_id, text, end_offset) one at a time from a JSONL or CSV file.
+
+    Reading begins at byte `offset`, which must be where record number
+    `start` begins; `end_offset` is where the next record starts.
+    """
+    with open(path, "rb") as f:
+        position = [0]
+        fieldnames = None
+        if fmt == "csv":
+            fieldnames = next(csv.reader(_lines(f, position)), None)
+        position[0] = max(offset, position[0])
+        f.seek(position[0])
+        if fmt == "csv":
+            rows = csv.DictReader(_lines(f, position), fieldnames=fieldnames)
+        else:
+            rows = (json.loads(line) for line in _lines(f, position) if line.strip())
+        for number, row in enumerate(rows, start):
+            yield row.get(id_field, number) if id_field else number, row.get(text_field), position[0]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_checkpoint(path, input_path):
+    """Return (records_done, output_bytes, input_offset)."""
+    if not os.path.exists(path):
+        return 0, 0, 0
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("input") != os.path.abspath(input_path):
+        sys.exit(f"Checkpoint {path} belongs to {state.get('input')}, not {input_path}")
+    return state["records_done"], state["output_bytes"], state["input_offset"]
+
+
+def save_checkpoint(path, input_path, records_done, output_bytes, input_offset):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({
+            "input": os.path.abspath(input_path),
+            "records_done": records_done,
+            "output_bytes": output_bytes,
+            "input_offset": input_offset,
+        }, f)
+    os.replace(tmp, path)
+
+
+def score_chunk(domain, chunk):
+    """Score the valid texts of a chunk in one batch; invalid ones get an error record."""
+    valid = [(record_id, text) for record_id, text, _ in chunk if isinstance(text, str) and text.strip()]
+    results = iter(BATCH_FUNCTIONS[domain]([text for _, text in valid])) if valid else iter(())
+    for record_id, text, _ in chunk:
+        if isinstance(text, str) and text.strip():
+            yield {"id": record_id, **next(results)}
+        else:
+            yield {"id": record_id, "error": "missing text"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSONL/CSV corpus offline with checkpoint/resume.")
+    parser.add_argument("input")
+    parser.add_argument("output", help="JSONL file that results are appended to")
+    parser.add_argument("--domain", choices=sorted(BATCH_FUNCTIONS), required=True)
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the input file extension")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", help="Field to copy into each result (defaults to the record number)")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--checkpoint", help="Defaults to <output>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start from scratch")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    checkpoint = args.checkpoint or f"{args.output}.checkpoint"
+    done, output_bytes, input_offset = (0, 0, 0) if args.restart else load_checkpoint(checkpoint, args.input)
+    if done and (not os.path.exists(args.output) or os.path.getsize(args.output) < output_bytes):
+        sys.exit(f"Checkpoint {checkpoint} covers {done} records, but {args.output} is missing or shorter than "
+                 f"{output_bytes} bytes; restore the output or rerun with --restart")
+
+    if predictors.load_models(names=[args.domain]):
+        sys.exit(f"Could not load the {args.domain} model")
+
+    # Drop anything written after the last checkpoint, then continue from there
+    with open(args.output, "r+b" if done else "wb") as out:
+        out.truncate(output_bytes if done else 0)
+        out.seek(0, os.SEEK_END)
+        if done:
+            print(f"Resuming after {done} records")
+
+        records = read_records(args.input, fmt, args.text_field, args.id_field, start=done, offset=input_offset)
+        started = time.perf_counter()
+        scored = 0
+        for chunk in chunked(records, args.chunk_size):
+            for result in score_chunk(args.domain, chunk):
+                out.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            done += len(chunk)
+            scored += len(chunk)
+            save_checkpoint(checkpoint, args.input, done, out.tell(), chunk[-1][2])
+
+            elapsed = time.perf_counter() - started
+            print(f"{done} records scored ({scored / elapsed:.1f} records/s)", flush=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"Finished: {scored} records this run in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.1f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import factcheck
+import predictors
+from batching import MicroBatcher
+
+TEXT = "The council said the report would be published next week."
+CHECK_SCORE = 0.4  # Two agreeing lookups settle the label as FAKE on their own
+
+
+class ForwardPasses:
+    """Stand-in for the news model that counts the rows it scores."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, texts):
+        self.rows += len(texts)
+        return [np.array([0.1, 0.2, 0.7]) for _ in texts]
+
+
+def fact_check_sources(delay_s):
+    def check(text):
+        time.sleep(delay_s)
+        return CHECK_SCORE, [f"Stub fact check ({CHECK_SCORE:+.0%} risk)"], True
+    return [("stub_a", "Stub A", check), ("stub_b", "Stub B", check)]
+
+
+def decisions(stage):
+    return predictors.CASCADE_DECISIONS._values.get((("domain", "news"), ("stage", stage)), 0.0)
+
+
+def run(label, batch_wait_ms, check_delay_s, texts, expect_model):
+    """Score `texts` in cascade mode and check each result agrees with whether the model actually ran.
+
+    `expect_model` is "all", "none" or "some" of the rows.
+    """
+    passes = ForwardPasses()
+    predictors.news_batcher = MicroBatcher(passes, max_batch_size=8, max_wait_ms=batch_wait_ms, name="check-batcher")
+    factcheck.FACT_CHECK_SOURCES[:] = fact_check_sources(check_delay_s)
+    before = {stage: decisions(stage) for stage in ("model", "fact_checks")}
+
+    if len(texts) == 1:
+        results = [predictors._predict_news(texts[0])[0]]
+    else:
+        results = [result for result, _ in predictors._predict_news_batch(texts)]
+    counted = {stage: int(decisions(stage) - before[stage]) for stage in before}
+    fused = [r for r in results if r["reasons"][0].startswith("Base AI Model risk score")]
+    skipped = [r for r in results if r["reasons"][0] == predictors.CASCADE_SKIP_REASON]
+
+    failures = []
+    if len(fused) + len(skipped) != len(texts):
+        failures.append(f"unexpected results: {results}")
+    if passes.rows != len(fused):
+        failures.append(f"{passes.rows} forward rows ran but {len(fused)} results carry the model score")
+    if counted != {"model": len(fused), "fact_checks": len(skipped)}:
+        failures.append(f"decisions {counted} don't match {len(fused)} fused and {len(skipped)} skipped results")
+    if any(r["confidence"] != 1.0 for r in fused) or any(abs(r["confidence"] - 2 * CHECK_SCORE) > 1e-9 for r in skipped):
+        failures.append(f"wrong confidences: {[r['confidence'] for r in results]}")
+    if any(r["label"] != "FAKE" for r in results):
+        failures.append(f"label changed: {[r['label'] for r in results]}")
+    expected = {"all": len(fused) == len(texts), "none": not fused, "some": len(skipped) > 0}[expect_model]
+    if not expected:
+        failures.append(f"expected the model to run for {expect_model} rows, it ran for {len(fused)}")
+
+    print(f"{label}: {'ok' if not failures else 'FAILED'} (forward rows {passes.rows}, decisions {counted})")
+    for failure in failures:
+        print(f"  {failure}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that cascade-mode news results match whether the model actually ran.")
+    parser.add_argument("--batch-size", type=int, default=12)
+    args = parser.parse_args()
+
+    predictors.CASCADE_MODE = True
+    predictors.get_model = lambda name: None
+    texts = [f"{TEXT} Item {i}." for i in range(args.batch_size)]
+    ok = all([
+        # Lookups outlast the batch window: the model has run by the time they settle the label
+        run("slow fact checks", batch_wait_ms=5, check_delay_s=0.2, texts=[TEXT], expect_model="all"),
+        # Lookups settle the label while the row is still queued: the pass is dropped
+        run("fast fact checks", batch_wait_ms=300, check_delay_s=0.0, texts=[TEXT], expect_model="none"),
+        run("slow fact checks, bulk", batch_wait_ms=5, check_delay_s=0.2, texts=texts, expect_model="all"),
+        # Full batches form at once, so only rows still queued behind them can be dropped
+        run("fast fact checks, bulk", batch_wait_ms=300, check_delay_s=0.0, texts=texts, expect_model="some"),
+    ])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CLAIM_INDEX_PATH = os.getenv("CLAIM_INDEX_PATH", "./claim_index.db")
+# Share of a claim's words that must appear in the text for it to count as a match
+CLAIM_MIN_OVERLAP = float(os.getenv("CLAIM_MIN_OVERLAP", "0.6"))
+# Distinct words of the text used in the full-text query
+CLAIM_QUERY_TERMS = int(os.getenv("CLAIM_QUERY_TERMS", "128"))
+
+_WORDS = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be been but by for from had has have he her his i in is it its of on or "
+    "she that the their they this to was were will with you your we our not no so than then there".split()
+)
+
+
+def _terms(text):
+    return [w for w in _WORDS.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _name(value):
+    value = _first(value)
+    return value.get("name") if isinstance(value, dict) else value
+
+
+def iter_claim_reviews(data):
+    """Yield normalised claim dicts from a ClaimReview dump.
+
+    Accepts schema.org ClaimReview objects (alone, in lists or in a DataFeed)
+    and Fact Check Tools API responses (`{"claims": [...]}`).
+    """
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_claim_reviews(item)
+        return
+    if not isinstance(data, dict):
+        return
+
+    if "dataFeedElement" in data:
+        for element in data["dataFeedElement"]:
+            yield from iter_claim_reviews(element.get("item", []))
+    elif "claims" in data:
+        for claim in data["claims"]:
+            for review in claim.get("claimReview", []):
+                yield {
+                    "claim": claim.get("text", ""),
+                    "claimant": claim.get("claimant", ""),
+                    "publisher": (review.get("publisher") or {}).get("name") or (review.get("publisher") or {}).get("site", ""),
+                    "rating": review.get("textualRating", ""),
+                    "url": review.get("url", ""),
+                    "review_date": review.get("reviewDate", ""),
+                }
+    elif data.get("@type") == "ClaimReview" or "claimReviewed" in data:
+        rating = _first(data.get("reviewRating")) or {}
+        yield {
+            "claim": data.get("claimReviewed", ""),
+            "claimant": _name((data.get("itemReviewed") or {}).get("author")) or "",
+            "publisher": _name(data.get("author")) or "",
+            "rating": rating.get("alternateName") or rating.get("name") or "",
+            "url": data.get("url", ""),
+            "review_date": data.get("datePublished", ""),
+        }
+
+
+def read_dump(path):
+    """Load a .json dump, or a .jsonl file with one JSON document per line."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield from iter_claim_reviews(json.loads(line))
+        else:
+            yield from iter_claim_reviews(json.load(f))
+
+
+class ClaimIndex:
+    """On-disk SQLite FTS5 index of fact-checked claims, ranked with bm25."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS claims USING fts5("
+                "claim, claimant UNINDEXED, publisher UNINDEXED, rating UNINDEXED, url UNINDEXED, "
+                "review_date UNINDEXED, tokenize='porter unicode61')"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS claim_keys (key TEXT PRIMARY KEY, claim_rowid INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def reopen(self):
+        """Drop connections inherited from a parent process; each thread reconnects on first use."""
+        self._local = threading.local()
+
+    def import_claims(self, claims):
+        """Insert or update claims (keyed by review URL and claim text); returns how many were written."""
+        conn = self._conn()
+        written = 0
+        with conn:
+            for c in claims:
+                if not c["claim"] or not c["rating"]:
+                    continue
+                key = hashlib.sha256(f"{c['url']}\0{c['claim']}".encode("utf-8")).hexdigest()
+                row = conn.execute("SELECT claim_rowid FROM claim_keys WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM claims WHERE rowid = ?", (row[0],))
+                cursor = conn.execute(
+                    "INSERT INTO claims (claim, claimant, publisher, rating, url, review_date) VALUES (?, ?, ?, ?, ?, ?)",
+                    (c["claim"], c["claimant"], c["publisher"], c["rating"], c["url"], c["review_date"]),
+                )
+                conn.execute("INSERT OR REPLACE INTO claim_keys (key, claim_rowid) VALUES (?, ?)", (key, cursor.lastrowid))
+                written += 1
+        return written
+
+    def search(self, text, limit=3):
+        """Best-matching claims for `text`, most relevant first, filtered by word overlap."""
+        text_terms = _terms(text)
+        query_terms = list(dict.fromkeys(text_terms))[:CLAIM_QUERY_TERMS]
+        if not query_terms:
+            return []
+        query = " OR ".join('"' + t.replace('"', '""') + '"' for t in query_terms)
+        rows = self._conn().execute(
+            "SELECT claim, claimant, publisher, rating, url, review_date, bm25(claims) FROM claims "
+            "WHERE claims MATCH ? ORDER BY bm25(claims) LIMIT ?",
+            (query, limit * 5),
+        ).fetchall()
+
+        present = set(text_terms)
+        matches = []
+        for claim, claimant, publisher, rating, url, review_date, rank in rows:
+            claim_terms = set(_terms(claim))
+            overlap = len(claim_terms & present) / len(claim_terms) if claim_terms else 0.0
+            if overlap >= CLAIM_MIN_OVERLAP:
+                matches.append({
+                    "claim": claim, "claimant": claimant, "publisher": publisher, "rating": rating,
+                    "url": url, "review_date": review_date, "overlap": round(overlap, 3), "bm25": rank,
+                })
+        return matches[:limit]
+
+    def count(self):
+        return self._conn().execute("SELECT count(*) FROM claims").fetchone()[0]
+
+
+claim_index = ClaimIndex(CLAIM_INDEX_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the local ClaimReview fact-check index.")
+    parser.add_argument("--index", default=CLAIM_INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Import ClaimReview JSON / JSONL dumps")
+    importer.add_argument("dumps", nargs="+")
+    search = commands.add_parser("search", help="Show the best-matching claims for a text")
+    search.add_argument("text")
+    search.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    index = ClaimIndex(args.index)
+    if args.command == "import":
+        for path in args.dumps:
+            started = time.perf_counter()
+            written = index.import_claims(read_dump(path))
+            print(f"{path}: {written} claims imported in {time.perf_counter() - started:.1f}s")
+        print(f"Index {args.index} now holds {index.count()} claims")
+    else:
+        started = time.perf_counter()
+        matches = index.search(args.text, args.limit)
+        print(json.dumps(matches, indent=2, ensure_ascii=False))
+        print(f"{len(matches)} matches in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
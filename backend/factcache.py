@@ -0,0 +1,146 @@
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class FactCheckCache:
+    """Bounded in-process LRU in front of a persistent SQLite store.
+
+    Values are the `(score, reasons)` tuples produced by the fact-check
+    lookups. Each entry carries its own expiry, so sources can use
+    different TTLs and "no match" answers can be cached for a shorter time.
+
+    The lock only guards the LRU: disk reads use one connection per thread
+    and writes go through a background writer, so lookup threads never wait
+    on each other's SQLite I/O. A path of "" or ":memory:" keeps only the LRU.
+    """
+
+    def __init__(self, path, max_entries=10000, max_pending_writes=10000):
+        self.path = path if path not in ("", ":memory:") else None
+        self.max_entries = max_entries
+        self.max_pending_writes = max_pending_writes
+        self._memory = OrderedDict()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "dropped_writes": 0}
+        self.reopen()
+
+    def reopen(self):
+        """Start over with a fresh lock, no connections and no writer, e.g. in a forked child process."""
+        self._lock = threading.Lock()
+        # Connections are opened on first use, so importing the predictors doesn't touch the disk
+        self._local = threading.local()
+        self._writes = queue.Queue(maxsize=self.max_pending_writes)
+        self._writer = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Readers don't block on the writer, and commits don't fsync every time
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS fact_checks ("
+            "key TEXT PRIMARY KEY, source TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _write(self, statement, params):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run_writer, name="factcheck-cache-writer", daemon=True)
+                    self._writer.start()
+        try:
+            self._writes.put_nowait((statement, params))
+        except queue.Full:
+            # Only the persistent copy is lost; the LRU already holds the value
+            with self._lock:
+                self.counters["dropped_writes"] += 1
+
+    def _run_writer(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM fact_checks WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+        while True:
+            batch = [self._writes.get()]
+            # Commit whatever queued up meanwhile together
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for statement, params in batch:
+                    conn.execute(statement, params)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"Error writing fact-check cache: {e}")
+
+    @staticmethod
+    def _key(source, text):
+        return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, source, text):
+        key = self._key(source, text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        row = None
+        if self.path is not None:
+            row = self._reader().execute(
+                "SELECT payload, expires_at FROM fact_checks WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None and row[1] > now:
+            score, reasons = json.loads(row[0])
+            value = (score, reasons)
+            with self._lock:
+                self._remember(key, row[1], value)
+                self.counters["disk_hits"] += 1
+            return value
+        if row is not None:
+            self._write("DELETE FROM fact_checks WHERE key = ? AND expires_at <= ?", (key, now))
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, source, text, value, ttl):
+        if ttl <= 0:
+            return
+        key = self._key(source, text)
+        expires_at = time.time() + ttl
+        score, reasons = value
+        with self._lock:
+            self._remember(key, expires_at, (score, list(reasons)))
+            self.counters["writes"] += 1
+        if self.path is not None:
+            self._write(
+                "INSERT OR REPLACE INTO fact_checks (key, source, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (key, source, json.dumps([score, list(reasons)]), expires_at),
+            )
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, memory_entries=len(self._memory))
@@ -0,0 +1,221 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from claim_index import claim_index
+from factcache import FactCheckCache
+
+# Overall budget for all fact-check lookups of one request
+FACT_CHECK_DEADLINE_S = float(os.getenv("FACT_CHECK_DEADLINE_S", "3.0"))
+FACT_CHECK_WORKERS = int(os.getenv("FACT_CHECK_WORKERS", "32"))
+
+def _new_session():
+    # Shared keep-alive connection pool for the upstream APIs
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=FACT_CHECK_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+http_session = _new_session()
+_executor = ThreadPoolExecutor(max_workers=FACT_CHECK_WORKERS, thread_name_prefix="factcheck")
+
+# Result cache (TTLs in seconds; "no match" answers use the negative TTL)
+FACT_CHECK_CACHE_PATH = os.getenv("FACT_CHECK_CACHE_PATH", "./factcheck_cache.db")
+FACT_CHECK_CACHE_SIZE = int(os.getenv("FACT_CHECK_CACHE_SIZE", "10000"))
+MBFC_CACHE_TTL_S = float(os.getenv("MBFC_CACHE_TTL_S", str(7 * 24 * 3600)))
+GOOGLE_CACHE_TTL_S = float(os.getenv("GOOGLE_CACHE_TTL_S", str(24 * 3600)))
+FACT_CHECK_NEGATIVE_TTL_S = float(os.getenv("FACT_CHECK_NEGATIVE_TTL_S", "3600"))
+
+fact_cache = FactCheckCache(FACT_CHECK_CACHE_PATH, max_entries=FACT_CHECK_CACHE_SIZE)
+
+# "api" queries the Google Fact Check Tools API per request; "local" searches the
+# offline ClaimReview index built with `python claim_index.py import <dumps>`
+GOOGLE_FACT_CHECK_BACKEND = os.getenv("GOOGLE_FACT_CHECK_BACKEND", "api").lower()
+
+def _after_fork_in_child():
+    # Sockets, executor threads and the SQLite handle must not be shared with the parent
+    global http_session, _executor
+    http_session = _new_session()
+    _executor = ThreadPoolExecutor(max_workers=FACT_CHECK_WORKERS, thread_name_prefix="factcheck")
+    fact_cache.reopen()
+    claim_index.reopen()
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _cached_lookup(source, text, lookup, ttl):
+    cached = fact_cache.get(source, text)
+    if cached is not None:
+        return cached
+    # Errors propagate and are never cached
+    score, reasons, matched = lookup(text)
+    fact_cache.put(source, text, (score, reasons), ttl if matched else FACT_CHECK_NEGATIVE_TTL_S)
+    return score, reasons
+
+def _lookup_mbc(text):
+    url = "https://mediabiasfactcheck.p.rapidapi.com/search"
+    headers = {
+        "X-RapidAPI-Key": os.getenv("MBFC_API_KEY"),
+        "X-RapidAPI-Host": os.getenv("MBFC_API_HOST")
+    }
+    query = {"query": text}
+
+    response = http_session.get(url, headers=headers, params=query, timeout=FACT_CHECK_DEADLINE_S)
+    data = response.json()
+
+    if len(data) == 0:
+        return 0.0, ["No matching source in MediaBiasFactCheck"], False
+
+    reliability = data[0].get("factual", "Mixed")
+
+    # Convert factual rating into score
+    mapping = {
+        "High": -0.3,     # reduces fake score
+        "Mostly Factual": -0.2,
+        "Mixed": 0.0,
+        "Low": 0.2,       # increases fake score
+        "Very Low": 0.3,
+        "Fake News": 0.4,
+        "Satire": 0.3
+    }
+
+    score = mapping.get(reliability, 0.0)
+    sign = "+" if score > 0 else ""
+    reason = f"MediaBiasFactCheck rating: {reliability} ({sign}{score:.0%} risk)"
+
+    return score, [reason], True
+
+def _check_mbc(text):
+    # `(score, reasons, complete)`; complete is False when the lookup failed
+    try:
+        score, reasons = _cached_lookup("mbfc", text, _lookup_mbc, MBFC_CACHE_TTL_S)
+        return score, reasons, True
+    except Exception as e:
+        # API seems to be down or invalid, return empty to not affect score
+        metrics.EXTERNAL_API_ERRORS.inc(source="mbfc")
+        return 0.0, [], False
+
+def check_news_source_with_mbc(text):
+    score, reasons, _ = _check_mbc(text)
+    return score, reasons
+
+def _lookup_google(text):
+    api_key = os.getenv("GOOGLE_API_KEY")
+    url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
+    params = {
+        "key": api_key,
+        "query": text,
+        "languageCode": "en"
+    }
+    
+    response = http_session.get(url, params=params, timeout=FACT_CHECK_DEADLINE_S)
+    data = response.json()
+    
+    if "claims" not in data or not data["claims"]:
+        return 0.0, [], False
+        
+    # Analyze the first claim found
+    claim = data["claims"][0]
+    claim_review = claim.get("claimReview", [])[0] if claim.get("claimReview") else {}
+    publisher = claim_review.get("publisher", {}).get("name", "Unknown")
+    rating = claim_review.get("textualRating", "Unknown")
+    
+    score = rating_score(rating)
+    sign = "+" if score > 0 else ""
+    reason = f"Google Fact Check ({publisher}): {rating} ({sign}{score:.0%} risk)"
+        
+    return score, [reason], True
+
+def rating_score(rating):
+    # Simple heuristic for a ClaimReview textual rating
+    rating_lower = rating.lower()
+    if "false" in rating_lower or "pants on fire" in rating_lower or "fake" in rating_lower:
+        return 0.4 # Strong signal for fake
+    elif "true" in rating_lower or "correct" in rating_lower:
+        return -0.4 # Strong signal for real
+    elif "mixture" in rating_lower or "misleading" in rating_lower:
+        return 0.2
+    return 0.0
+
+def _lookup_claim_index(text):
+    matches = claim_index.search(text, limit=1)
+    if not matches:
+        return 0.0, [], False
+    match = matches[0]
+    score = rating_score(match["rating"])
+    sign = "+" if score > 0 else ""
+    reason = f"Fact Check ({match['publisher'] or 'Unknown'}): {match['rating']} ({sign}{score:.0%} risk)"
+    return score, [reason], True
+
+def _check_google(text):
+    # `(score, reasons, complete)`; complete is False when the lookup failed
+    try:
+        if GOOGLE_FACT_CHECK_BACKEND == "local":
+            # The local index answers in milliseconds and changes on import, so it bypasses the cache
+            score, reasons, _ = _lookup_claim_index(text)
+        else:
+            score, reasons = _cached_lookup("google", text, _lookup_google, GOOGLE_CACHE_TTL_S)
+        return score, reasons, True
+    except Exception as e:
+        metrics.EXTERNAL_API_ERRORS.inc(source="google")
+        return 0.0, [f"Google Fact Check error: {str(e)}"], False
+
+def check_google_fact_check(text):
+    score, reasons, _ = _check_google(text)
+    return score, reasons
+
+FACT_CHECK_SOURCES = [
+    ("mbfc", "MediaBiasFactCheck", _check_mbc),
+    ("google", "Google Fact Check", _check_google),
+]
+
+def _timed(check, text):
+    started = time.perf_counter()
+    result = check(text)
+    return result, time.perf_counter() - started
+
+def start_fact_checks(text):
+    """Kick off every fact-check lookup for `text` in the background."""
+    started = time.monotonic()
+    futures = [(key, name, _executor.submit(_timed, check, text)) for key, name, check in FACT_CHECK_SOURCES]
+    return started, started + FACT_CHECK_DEADLINE_S, futures
+
+def iter_fact_checks(pending):
+    """Yield `(index, name, (score, reasons), complete)` as lookups finish.
+
+    Late lookups contribute 0 at the deadline; they and failed lookups have
+    `complete` False, and results built on them should not be cached.
+    """
+    started, deadline, futures = pending
+    remaining = {future: i for i, (_, _, future) in enumerate(futures)}
+    try:
+        for future in as_completed(list(remaining), timeout=max(0.0, deadline - time.monotonic())):
+            i = remaining.pop(future)
+            key, name, _ = futures[i]
+            (score, reasons, complete), elapsed = future.result()
+            metrics.record_stage("news", key, elapsed)
+            yield i, name, (score, reasons), complete
+    except FutureTimeout:
+        pass
+    for future, i in sorted(remaining.items(), key=lambda item: item[1]):
+        key, name, _ = futures[i]
+        future.cancel()
+        metrics.EXTERNAL_API_TIMEOUTS.inc(source=key)
+        metrics.record_stage("news", key, time.monotonic() - started)
+        yield i, name, (0.0, [f"{name} lookup timed out (no contribution)"]), False
+
+def collect_fact_checks(pending):
+    """Wait for started lookups until the shared deadline; return `(results, complete)`.
+
+    `complete` is False if any lookup timed out or failed.
+    """
+    results = [None] * len(pending[2])
+    complete = True
+    for i, _, result, ok in iter_fact_checks(pending):
+        results[i] = result
+        complete = complete and ok
+    return results, complete
@@ -0,0 +1,149 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, insert, or_
+
+import metrics
+from database import SessionLocal
+from models import PredictionHistory
+from predcache import text_digest
+
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_INTERVAL_S = float(os.getenv("HISTORY_FLUSH_INTERVAL_S", "1.0"))
+
+HISTORY_DROPPED = metrics.register(
+    metrics.Counter("trustlens_history_dropped_total", "History rows dropped because the write queue was full")
+)
+HISTORY_WRITTEN = metrics.register(
+    metrics.Counter("trustlens_history_written_total", "History rows committed to the database")
+)
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """Write-behind queue that bulk-inserts prediction history on a background thread.
+
+    `record` never blocks the request: when the queue is full the row is
+    dropped and counted instead.
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def reset(self):
+        """Forget the queue and thread, e.g. in a forked child where the writer thread doesn't exist."""
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._thread = None
+
+    def stop(self):
+        """Flush whatever is queued and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def record(self, username, domain, text, result):
+        row = {
+            "username": username,
+            "domain": domain,
+            "text_hash": text_digest(text),
+            "label": result["label"],
+            "score": float(result["confidence"]),
+            "reasons": json.dumps(result["reasons"]),
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            HISTORY_DROPPED.inc()
+
+    def _collect(self):
+        rows = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(rows) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return rows, True
+            rows.append(item)
+        return rows, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            rows, stopping = self._collect()
+            if rows:
+                self._write(rows)
+
+    def _write(self, rows):
+        db = SessionLocal()
+        try:
+            db.execute(insert(PredictionHistory), rows)
+            db.commit()
+            HISTORY_WRITTEN.inc(len(rows))
+        except Exception as e:
+            db.rollback()
+            HISTORY_DROPPED.inc(len(rows))
+            print(f"Error writing prediction history: {e}")
+        finally:
+            db.close()
+
+
+history_writer = HistoryWriter(HISTORY_QUEUE_SIZE, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL_S)
+# Inference workers never record history; a child forked mid-write must not inherit a held queue lock
+os.register_at_fork(after_in_child=history_writer.reset)
+
+
+def query_history(db, username, limit=50, before_id=None, domain=None, text_hash=None):
+    """Return one page of a user's history, newest first, and the cursor for the next page.
+
+    Keyset pagination on (created_at, id) walks the (username, created_at)
+    index instead of counting past skipped rows.
+    """
+    query = db.query(PredictionHistory).filter(PredictionHistory.username == username)
+    if domain:
+        query = query.filter(PredictionHistory.domain == domain)
+    if text_hash:
+        query = query.filter(PredictionHistory.text_hash == text_hash)
+    if before_id is not None:
+        anchor = db.query(PredictionHistory.created_at).filter(
+            PredictionHistory.id == before_id, PredictionHistory.username == username
+        ).scalar()
+        if anchor is None:
+            return [], None
+        query = query.filter(or_(
+            PredictionHistory.created_at < anchor,
+            and_(PredictionHistory.created_at == anchor, PredictionHistory.id < before_id),
+        ))
+
+    rows = query.order_by(PredictionHistory.created_at.desc(), PredictionHistory.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    items = [
+        {
+            "id": row.id,
+            "domain": row.domain,
+            "text_hash": row.text_hash,
+            "label": row.label,
+            "confidence": row.score,
+            "reasons": json.loads(row.reasons),
+            "created_at": row.created_at.isoformat() + "Z",
+        }
+        for row in rows[:limit]
+    ]
+    return items, next_cursor
@@ -0,0 +1,205 @@
+import json
+import os
+import struct
+
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+try:
+    import onnxruntime as ort
+except ImportError:  # optional dependency, only needed for the "onnx" backend
+    ort = None
+
+INFERENCE_BACKENDS = ("torch", "int8", "onnx")
+
+# Exported artifacts are cached inside the model directory
+INT8_ARTIFACT = "model.int8.pt"
+ONNX_ARTIFACT = "model.onnx"
+
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+# Memory-map safetensors weights for the torch backend so processes share one page-cache copy
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+
+def _softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def _weights_mtime(model_dir):
+    mtimes = [
+        os.path.getmtime(os.path.join(model_dir, name))
+        for name in ("model.safetensors", "pytorch_model.bin", "config.json")
+        if os.path.exists(os.path.join(model_dir, name))
+    ]
+    return max(mtimes) if mtimes else 0.0
+
+
+def _is_fresh(artifact, model_dir):
+    return os.path.exists(artifact) and os.path.getmtime(artifact) >= _weights_mtime(model_dir)
+
+
+def _write_artifact(artifact, write):
+    """Run `write(path)` on a temp file next to `artifact` and rename it into place.
+
+    An interrupted export then never leaves a partial artifact that
+    `_is_fresh` would accept.
+    """
+    tmp = f"{artifact}.{os.getpid()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, artifact)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class TorchRunner:
+    """fp32 PyTorch eager inference."""
+
+    backend = "torch"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, inputs):
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+            return torch.nn.functional.softmax(logits, dim=-1).tolist()
+
+    def size_bytes(self):
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class Int8Runner(TorchRunner):
+    """Dynamic int8 quantization of the Linear layers, still run through PyTorch."""
+
+    backend = "int8"
+
+    def __init__(self, model, path):
+        super().__init__(model)
+        self.path = path
+
+    def size_bytes(self):
+        # Quantized weights are packed params, not visible to parameters()
+        return os.path.getsize(self.path)
+
+
+class OnnxRunner:
+    """ONNX Runtime CPU session over an exported graph."""
+
+    backend = "onnx"
+
+    def __init__(self, path):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS > 0:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def predict_proba(self, inputs):
+        feed = {name: inputs[name].numpy() for name in self.input_names}
+        (logits,) = self.session.run(["logits"], feed)
+        return _softmax(logits).tolist()
+
+    def size_bytes(self):
+        return os.path.getsize(self.path)
+
+
+def _quantize(model):
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_int8(model_dir):
+    artifact = os.path.join(model_dir, INT8_ARTIFACT)
+    if _is_fresh(artifact, model_dir):
+        config = AutoConfig.from_pretrained(model_dir)
+        model = _quantize(AutoModelForSequenceClassification.from_config(config).eval())
+        model.load_state_dict(torch.load(artifact, weights_only=True))
+    else:
+        print(f"Quantizing {model_dir} to int8...")
+        model = _quantize(AutoModelForSequenceClassification.from_pretrained(model_dir).eval())
+        _write_artifact(artifact, lambda path: torch.save(model.state_dict(), path))
+    return Int8Runner(model.eval(), artifact)
+
+
+def _export_onnx(model_dir, artifact):
+    print(f"Exporting {model_dir} to ONNX...")
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+    dummy = torch.ones((1, 8), dtype=torch.long)
+    axes = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        _write_artifact(artifact, lambda path: torch.onnx.export(
+            model,
+            (dummy, torch.ones_like(dummy)),
+            path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={"input_ids": axes, "attention_mask": axes, "logits": {0: "batch"}},
+            opset_version=14,
+        ))
+
+
+def mmap_safetensors(path):
+    """Tensors of a .safetensors file as views into one private (copy-on-write) file mapping."""
+    with open(path, "rb") as f:
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data = torch.tensor([], dtype=torch.uint8).set_(storage)[8 + header_size:]
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        start, end = info["data_offsets"]
+        tensors[name] = data[start:end].view(SAFETENSORS_DTYPES[info["dtype"]]).view(info["shape"])
+    return tensors
+
+
+def _load_torch_mmap(model_dir):
+    path = os.path.join(model_dir, "model.safetensors")
+    config = AutoConfig.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_config(config)
+    try:
+        missing, _ = model.load_state_dict(mmap_safetensors(path), strict=False, assign=True)
+    except (RuntimeError, KeyError, ValueError) as e:
+        missing = [str(e)]
+    if missing:
+        print(f"Warning: could not memory-map {path}, loading it into memory instead")
+        return AutoModelForSequenceClassification.from_pretrained(model_dir)
+    return model
+
+
+def load_runner(model_dir, backend="torch"):
+    """Build the inference runner for `model_dir`, exporting and caching optimized artifacts as needed."""
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {INFERENCE_BACKENDS}")
+
+    if backend == "onnx" and ort is None:
+        print("Warning: onnxruntime is not installed, falling back to the torch backend")
+        backend = "torch"
+
+    if backend == "int8":
+        return _load_int8(model_dir)
+    if backend == "onnx":
+        artifact = os.path.join(model_dir, ONNX_ARTIFACT)
+        if not _is_fresh(artifact, model_dir):
+            _export_onnx(model_dir, artifact)
+        return OnnxRunner(artifact)
+
+    if MODEL_MMAP and os.path.exists(os.path.join(model_dir, "model.safetensors")):
+        return TorchRunner(_load_torch_mmap(model_dir).eval())
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    return TorchRunner(model.eval())
@@ -1,22 +1,65 @@
+import hmac
+import json
+import os
 import sqlite3
-from contextlib import asynccontextmanager
-from datetime import timedelta
+import threading
+import time
+from contextlib import ExitStack, asynccontextmanager
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
-from auth import verify_password, get_password_hash, create_access_token
+from anyio import to_thread
+from jose import JWTError
+
+from auth import (
+    HashingBusy,
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    verify_password_async,
+)
 from database import engine, get_db, Base, SessionLocal
 from models import User
-from predictors import load_models, predict_news, predict_review, predict_job
-from schemas import Token, UserCreate, PredictionResponse, TextRequest
+import metrics
+from admission import BULK, INTERACTIVE, admission
+from history import history_writer, query_history
+from predictors import load_models, model_registry, reload_model, start_model_watcher
+from workers import (
+    INFERENCE_WORKERS,
+    request_reload,
+    run_prediction,
+    run_batch_prediction,
+    start_pool,
+    stop_pool,
+    stream_news_prediction,
+)
+from router import content_router
+from schemas import (
+    AutoBatchRequest,
+    AutoPredictionResponse,
+    AutoRequest,
+    BatchTextRequest,
+    HistoryPage,
+    PredictionResponse,
+    TextRequest,
+    Token,
+    UserCreate,
+)
 
 DEMO_USERNAME = "demo"
 DEMO_EMAIL = "demo@trustlens.ai"
 DEMO_PASSWORD = "demo123"
+MAX_BATCH_ITEMS = 1000
+# Model reloads are restricted to these usernames (comma separated) or callers sending X-Reload-Token
+MODEL_ADMIN_USERS = frozenset(u.strip() for u in os.getenv("MODEL_ADMIN_USERS", "").split(",") if u.strip())
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN", "")
 
 
 def ensure_email_column():
@@ -49,19 +92,90 @@ def ensure_default_user():
         db.close()
 
 
-# Create tables / migrations
-Base.metadata.create_all(bind=engine)
-ensure_email_column()
-ensure_default_user()
+def bootstrap_database():
+    """Create tables / migrations and the demo account."""
+    Base.metadata.create_all(bind=engine)
+    ensure_email_column()
+    ensure_default_user()
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Validate the bearer token and return the username it was issued to."""
+    try:
+        return decode_access_token(token)["sub"]
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def require_model_admin(
+    username: str = Depends(get_current_user),
+    x_reload_token: str | None = Header(default=None),
+):
+    """Allow only configured model admins; with neither setting configured nobody may reload."""
+    if username in MODEL_ADMIN_USERS:
+        return username
+    if MODEL_RELOAD_TOKEN and x_reload_token and hmac.compare_digest(x_reload_token, MODEL_RELOAD_TOKEN):
+        return username
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Model reloads require an admin account or reload token")
+
+
+def auth_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+# Readiness is reported by /readyz once startup() has loaded and warmed every PRELOAD_MODELS model
+startup_state = {"ready": False, "error": None, "seconds": None}
+
+
+def startup():
+    started = time.perf_counter()
+    try:
+        bootstrap_database()
+        if INFERENCE_WORKERS > 0:
+            failed = load_models(warmup=False)
+            start_pool()
+        else:
+            failed = load_models()
+        # Background threads start only after the workers have forked
+        history_writer.start()
+        start_model_watcher()
+        if failed:
+            # Not ready: requests for these models would pay (and fail) the load themselves
+            startup_state["error"] = f"Could not load the {', '.join(failed)} model(s)"
+        else:
+            startup_state["ready"] = True
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"Startup failed: {e}")
+    startup_state["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"Startup finished in {startup_state['seconds']}s")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load models on startup
-    load_models()
+    # Requests waiting for an inference slot hold a threadpool thread; leave room for everything else
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, admission.thread_demand() + 40)
+    if INFERENCE_WORKERS > 0:
+        # Workers must be forked before the server starts handling requests on other threads
+        startup()
+    else:
+        # Serve /healthz right away; /readyz flips once models are loaded and warm
+        threading.Thread(target=startup, name="startup", daemon=True).start()
     yield
     # Clean up if needed
+    stop_pool()
+    history_writer.stop()
 
 app = FastAPI(title="TrustLens API", lifespan=lifespan)
 
@@ -74,28 +188,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/auth/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+# The handlers are async so they can await the bcrypt executor; database work runs on the thread pool
+
+def _find_existing_user(db, user):
     filters = [User.username == user.username]
     if user.email:
         filters.append(User.email == user.email)
+    return db.query(User).filter(or_(*filters)).first()
 
-    existing = db.query(User).filter(or_(*filters)).first()
-
-    if existing:
-        raise HTTPException(status_code=400, detail="Username or email already registered")
-    hashed_password = get_password_hash(user.password)
+def _add_user(db, user, hashed_password):
     new_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    return new_user
+
+def _find_user(db, username):
+    return db.query(User).filter(User.username == username).first()
+
+@app.post("/auth/register", response_model=Token)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(_find_existing_user, db, user)
+
+    if existing:
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except HashingBusy:
+        raise auth_busy()
+    new_user = await run_in_threadpool(_add_user, db, user, hashed_password)
     access_token = create_access_token(data={"sub": new_user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/auth/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    try:
+        verified = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except HashingBusy:
+        raise auth_busy()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -108,17 +240,187 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 def read_root():
     return {"message": "TrustLens API is running"}
 
+@app.get("/healthz")
+def healthz():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readyz():
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail=startup_state["error"] or "Starting up")
+    return {"status": "ready", "startup_seconds": startup_state["seconds"], "loaded": model_registry.loaded()}
+
+@app.get("/models")
+def list_models():
+    return {
+        "available": model_registry.names(),
+        "loaded": model_registry.loaded(),
+        "resident_mb": round(model_registry.total_bytes() / (1024 * 1024), 1),
+        "budget_mb": round(model_registry.budget_bytes / (1024 * 1024), 1),
+    }
+
+# Latest reload of each model: {"status": "loading" | "live" | "failed", ...}
+model_reloads = {}
+model_reloads_lock = threading.Lock()
+
+
+def _run_reload(name, requested_by):
+    try:
+        info = reload_model(name)
+        state = {"status": "live", "model": info}
+    except HTTPException as e:
+        state = {"status": "failed", "error": e.detail}
+    except Exception as e:
+        state = {"status": "failed", "error": str(e)}
+    with model_reloads_lock:
+        model_reloads[name] = dict(state, requested_by=requested_by, finished_at=time.time())
+
+
+@app.post("/models/{name}/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_model_endpoint(name: str, username: str = Depends(require_model_admin)):
+    if name not in model_registry.names():
+        raise HTTPException(status_code=404, detail=f"Unknown model {name!r}")
+    with model_reloads_lock:
+        current = model_reloads.get(name)
+        if current is None or current["status"] != "loading":
+            current = {"status": "loading", "requested_by": username, "started_at": time.time()}
+            model_reloads[name] = current
+            # Loads and warms the new version off the request thread while requests keep using the old one
+            threading.Thread(target=_run_reload, args=(name, username), name=f"reload-{name}", daemon=True).start()
+    return dict(current, workers_notified=request_reload(name))
+
+@app.get("/models/{name}/reload")
+def reload_status(name: str, username: str = Depends(require_model_admin)):
+    if name not in model_registry.names():
+        raise HTTPException(status_code=404, detail=f"Unknown model {name!r}")
+    with model_reloads_lock:
+        return model_reloads.get(name) or {"status": "idle"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/predict/news", response_model=PredictionResponse)
-def api_predict_news(request: TextRequest, token: str = Depends(oauth2_scheme)):
-    result = predict_news(request.text)
+def api_predict_news(request: TextRequest, username: str = Depends(get_current_user)):
+    with metrics.track_request("news"), admission.admit("news", username):
+        result = run_prediction("news", request.text)
+    history_writer.record(username, "news", request.text, result)
     return PredictionResponse(label=result["label"], confidence=result["confidence"], reasons=result["reasons"])
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/predict/news/stream")
+def api_predict_news_stream(request: TextRequest, username: str = Depends(get_current_user)):
+    # The request is tracked until the last event has been sent
+    tracking = ExitStack()
+    tracking.enter_context(metrics.track_request("news_stream"))
+    try:
+        events = stream_news_prediction(request.text)
+        # Produce the first event before responding so model errors still return a proper status code
+        # Only the model stage holds an inference slot; the fact checks that follow are network waits
+        with admission.admit("news", username):
+            first = next(events)
+    except BaseException:
+        tracking.close()
+        raise
+
+    def stream():
+        with tracking:
+            event, data = first
+            yield _sse(event, data)
+            for event, data in events:
+                yield _sse(event, data)
+        history_writer.record(username, "news", request.text, data)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.post("/predict/review", response_model=PredictionResponse)
-def api_predict_review(request: TextRequest, token: str = Depends(oauth2_scheme)):
-    result = predict_review(request.text)
+def api_predict_review(request: TextRequest, username: str = Depends(get_current_user)):
+    with metrics.track_request("review"), admission.admit("review", username):
+        result = run_prediction("review", request.text)
+    history_writer.record(username, "review", request.text, result)
     return PredictionResponse(label=result["label"], confidence=result["confidence"], reasons=result["reasons"])
 
 @app.post("/predict/job", response_model=PredictionResponse)
-def api_predict_job(request: TextRequest, token: str = Depends(oauth2_scheme)):
-    result = predict_job(request.text)
+def api_predict_job(request: TextRequest, username: str = Depends(get_current_user)):
+    with metrics.track_request("job"), admission.admit("job", username):
+        result = run_prediction("job", request.text)
+    history_writer.record(username, "job", request.text, result)
     return PredictionResponse(label=result["label"], confidence=result["confidence"], reasons=result["reasons"])
+
+
+def check_batch_size(request: BatchTextRequest):
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    if len(request.texts) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} texts per batch")
+
+@app.post("/predict/news/batch", response_model=list[PredictionResponse])
+def api_predict_news_batch(request: BatchTextRequest, username: str = Depends(get_current_user)):
+    check_batch_size(request)
+    with metrics.track_request("news_batch"), admission.admit("news", username, BULK, len(request.texts)):
+        results = run_batch_prediction("news", request.texts)
+    for text, result in zip(request.texts, results):
+        history_writer.record(username, "news", text, result)
+    return [PredictionResponse(label=r["label"], confidence=r["confidence"], reasons=r["reasons"]) for r in results]
+
+@app.post("/predict/review/batch", response_model=list[PredictionResponse])
+def api_predict_review_batch(request: BatchTextRequest, username: str = Depends(get_current_user)):
+    check_batch_size(request)
+    with metrics.track_request("review_batch"), admission.admit("review", username, BULK, len(request.texts)):
+        results = run_batch_prediction("review", request.texts)
+    for text, result in zip(request.texts, results):
+        history_writer.record(username, "review", text, result)
+    return [PredictionResponse(label=r["label"], confidence=r["confidence"], reasons=r["reasons"]) for r in results]
+
+@app.post("/predict/job/batch", response_model=list[PredictionResponse])
+def api_predict_job_batch(request: BatchTextRequest, username: str = Depends(get_current_user)):
+    check_batch_size(request)
+    with metrics.track_request("job_batch"), admission.admit("job", username, BULK, len(request.texts)):
+        results = run_batch_prediction("job", request.texts)
+    for text, result in zip(request.texts, results):
+        history_writer.record(username, "job", text, result)
+    return [PredictionResponse(label=r["label"], confidence=r["confidence"], reasons=r["reasons"]) for r in results]
+
+def admit_domains(stack, username, domains, lane=INTERACTIVE, cost=1):
+    # Gates are taken in a fixed order so concurrent multi-domain requests can't deadlock
+    for n, domain in enumerate(sorted(domains)):
+        stack.enter_context(admission.admit(domain, username, lane, cost if n == 0 else 0))
+
+@app.post("/predict/auto", response_model=AutoPredictionResponse)
+def api_predict_auto(request: AutoRequest, username: str = Depends(get_current_user)):
+    domains = ["news", "review", "job"] if request.run_all else content_router.route(request.text)[0]
+    with metrics.track_request("auto"), ExitStack() as stack:
+        admit_domains(stack, username, domains)
+        result = run_prediction("auto_all" if request.run_all else "auto", request.text)
+    for domain, verdict in result["results"].items():
+        history_writer.record(username, domain, request.text, verdict)
+    return result
+
+@app.post("/predict/auto/batch", response_model=list[AutoPredictionResponse])
+def api_predict_auto_batch(request: AutoBatchRequest, username: str = Depends(get_current_user)):
+    check_batch_size(request)
+    if request.run_all:
+        domains = {"news", "review", "job"}
+    else:
+        domains = {d for text in request.texts for d in content_router.route(text)[0]}
+    with metrics.track_request("auto_batch"), ExitStack() as stack:
+        admit_domains(stack, username, domains, BULK, len(request.texts))
+        results = run_batch_prediction("auto_all" if request.run_all else "auto", request.texts)
+    for text, result in zip(request.texts, results):
+        for domain, verdict in result["results"].items():
+            history_writer.record(username, domain, text, verdict)
+    return results
+
+@app.get("/history", response_model=HistoryPage)
+def get_history(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: int | None = None,
+    domain: str | None = None,
+    text_hash: str | None = None,
+    username: str = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    items, next_cursor = query_history(db, username, limit, before_id, domain, text_hash)
+    return {"items": items, "next_cursor": next_cursor}
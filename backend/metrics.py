@@ -0,0 +1,228 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Requests slower than this are logged with their per-stage breakdown (0 disables)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_log = logging.getLogger("trustlens.slow_requests")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def render(self):
+        with self._lock:
+            items = [(k, (list(counts), total, n)) for k, (counts, total, n) in self._values.items()]
+        lines = self._header()
+        for key, (counts, total, n) in items:
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("trustlens_stage_seconds", "Time spent per pipeline stage")
+EXTERNAL_API_ERRORS = Counter("trustlens_external_api_errors_total", "Failed calls to external fact-check APIs")
+EXTERNAL_API_TIMEOUTS = Counter("trustlens_external_api_timeouts_total", "Fact-check lookups that missed the request deadline")
+IN_FLIGHT = Gauge("trustlens_in_flight_requests", "Prediction requests currently being served")
+
+_metrics = [STAGE_SECONDS, EXTERNAL_API_ERRORS, EXTERNAL_API_TIMEOUTS, IN_FLIGHT]
+_collectors = []
+_request = threading.local()
+# What export_deltas() last reported, per metric name and label set
+_exported = {}
+_export_lock = threading.Lock()
+
+
+def register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(fn):
+    """Add a callback that returns extra exposition lines at scrape time."""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+def _copy_values(metric):
+    with metric._lock:
+        if isinstance(metric, Histogram):
+            return {k: (list(counts), total, n) for k, (counts, total, n) in metric._values.items()}
+        return dict(metric._values)
+
+
+def export_deltas():
+    """Counter and histogram changes since the last call, as plain values for another process to merge().
+
+    Inference workers send these back with each result, since /metrics is
+    served from the API process. Gauges describe the local process and are
+    not exported.
+    """
+    deltas = []
+    with _export_lock:
+        for metric in _metrics:
+            if isinstance(metric, Gauge):
+                continue
+            last = _exported.setdefault(metric.name, {})
+            for key, value in _copy_values(metric).items():
+                previous = last.get(key)
+                if isinstance(metric, Histogram):
+                    counts, total, n = value
+                    if previous is not None:
+                        if n == previous[2]:
+                            continue
+                        counts = [a - b for a, b in zip(counts, previous[0])]
+                        total, n = total - previous[1], n - previous[2]
+                    deltas.append((metric.name, key, (counts, total, n)))
+                elif value != (previous or 0.0):
+                    deltas.append((metric.name, key, value - (previous or 0.0)))
+                last[key] = value
+    return deltas
+
+
+def _after_fork_in_child():
+    # Values inherited from the parent are already counted there; export only what this process adds
+    global _export_lock
+    _export_lock = threading.Lock()
+    for metric in _metrics:
+        metric._lock = threading.Lock()
+        if not isinstance(metric, Gauge):
+            _exported[metric.name] = _copy_values(metric)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def merge(deltas):
+    """Add deltas from export_deltas() in another process to the local metrics."""
+    by_name = {metric.name: metric for metric in _metrics}
+    breakdown = getattr(_request, "breakdown", None)
+    for name, key, delta in deltas:
+        metric = by_name.get(name)
+        if metric is None:
+            continue
+        with metric._lock:
+            if isinstance(metric, Histogram):
+                counts, total, n = metric._values.get(key, ([0] * len(metric.buckets), 0.0, 0))
+                metric._values[key] = ([a + b for a, b in zip(counts, delta[0])], total + delta[1], n + delta[2])
+            else:
+                metric._values[key] = metric._values.get(key, 0.0) + delta
+        if metric is STAGE_SECONDS and breakdown is not None:
+            # Stages that ran in a worker still count towards this request's slow-log breakdown
+            stage = dict(key)["stage"]
+            breakdown[stage] = breakdown.get(stage, 0.0) + delta[1]
+
+
+def record_stage(domain, name, seconds):
+    STAGE_SECONDS.observe(seconds, domain=domain, stage=name)
+    breakdown = getattr(_request, "breakdown", None)
+    if breakdown is not None:
+        breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(domain, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(domain, name, time.perf_counter() - started)
+
+
+@contextmanager
+def track_request(domain):
+    """Count the request as in flight and time it end to end, logging slow ones."""
+    IN_FLIGHT.inc(domain=domain)
+    breakdown = _request.breakdown = {}
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - started
+        STAGE_SECONDS.observe(total, domain=domain, stage="total")
+        IN_FLIGHT.dec(domain=domain)
+        # Streaming responses may finish on a different thread than they started on
+        if getattr(_request, "breakdown", None) is breakdown:
+            _request.breakdown = None
+        if SLOW_REQUEST_MS and total * 1000 >= SLOW_REQUEST_MS:
+            stages = ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in sorted(breakdown.items(), key=lambda kv: -kv[1]))
+            slow_log.warning("Slow %s request: total=%.1fms %s", domain, total * 1000, stages)
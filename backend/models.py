@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
 from database import Base
 
 
@@ -9,3 +9,21 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=True)
     hashed_password = Column(String, nullable=False)
+
+
+class PredictionHistory(Base):
+    __tablename__ = "prediction_history"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String, nullable=False)
+    domain = Column(String, nullable=False)
+    text_hash = Column(String(64), nullable=False)
+    label = Column(String, nullable=False)
+    score = Column(Float, nullable=False)
+    reasons = Column(Text, nullable=False)  # JSON list
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_prediction_history_user_time", "username", "created_at"),
+        Index("ix_prediction_history_text_hash", "text_hash"),
+    )
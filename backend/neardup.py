@@ -0,0 +1,165 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from predcache import normalize_text, text_digest
+
+_TOKEN = re.compile(r"\w+|[^\w\s]+")
+
+
+def simhash(text):
+    """64-bit SimHash over the lowercased tokens (words and punctuation runs) and token pairs of `text`."""
+    words = _TOKEN.findall(normalize_text(text).lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(features)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+def similarity(a, b):
+    return 1.0 - (a ^ b).bit_count() / 64
+
+
+class NearDuplicateIndex:
+    """LRU of recent model scores looked up by SimHash, optionally persisted to SQLite.
+
+    Values are JSON-serialisable model outputs; callers rerun their cheap
+    rules on the new text and fuse them with the reused score.
+
+    Fingerprints are split into `max_distance + 1` bands and bucketed per
+    band: two fingerprints within `max_distance` bits must agree on at least
+    one whole band, so probing one bucket per band finds every candidate.
+    """
+
+    def __init__(self, max_entries=20000, threshold=0.9, ttl=86400, path=None, min_words=8):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.path = path
+        self.min_words = min_words
+        self.max_distance = int((1.0 - threshold) * 64)
+        widths = [len(b) for b in np.array_split(np.arange(64), self.max_distance + 1)]
+        self._bands = [(sum(widths[i + 1:]), (1 << w) - 1) for i, w in enumerate(widths)]
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self.counters = {"hits": 0, "misses": 0, "writes": 0}
+        if path:
+            self._conn = self._connect()
+            self._load()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Writes happen on the request path; WAL avoids an fsync per entry
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS near_duplicate_scores ("
+            "key TEXT PRIMARY KEY, predictor TEXT NOT NULL, version TEXT NOT NULL, "
+            "fingerprint TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _load(self):
+        self._conn.execute("DELETE FROM near_duplicate_scores WHERE expires_at <= ?", (time.time(),))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT key, predictor, version, fingerprint, payload, expires_at FROM near_duplicate_scores "
+            "ORDER BY expires_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, predictor, version, fingerprint, payload, expires_at in reversed(rows):
+            self._remember(key, predictor, version, int(fingerprint, 16), expires_at, json.loads(payload))
+
+    def reopen(self):
+        """Start over with a fresh connection and lock, e.g. in a forked child process."""
+        self._lock = threading.Lock()
+        if self.path:
+            self._conn = self._connect()
+
+    def _band_keys(self, predictor, version, fingerprint):
+        return [(predictor, version, i, (fingerprint >> shift) & mask) for i, (shift, mask) in enumerate(self._bands)]
+
+    def _remember(self, key, predictor, version, fingerprint, expires_at, scores):
+        if key in self._entries:
+            self._forget(key)
+        self._entries[key] = (predictor, version, fingerprint, expires_at, scores)
+        for band in self._band_keys(predictor, version, fingerprint):
+            self._buckets.setdefault(band, set()).add(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._forget(next(iter(self._entries))))
+        return evicted
+
+    def _forget(self, key):
+        predictor, version, fingerprint, _, _ = self._entries.pop(key)
+        for band in self._band_keys(predictor, version, fingerprint):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+        return key
+
+    def eligible(self, text):
+        return len(text.split()) >= self.min_words
+
+    def get(self, predictor, version, text):
+        """Return `(scores, similarity)` for the closest stored entry at or above the threshold, or None."""
+        if not self.eligible(text):
+            return None
+        fingerprint = simhash(text)
+        now = time.time()
+        with self._lock:
+            candidates = set()
+            for band in self._band_keys(predictor, version, fingerprint):
+                candidates |= self._buckets.get(band, set())
+
+            best, best_similarity = None, self.threshold
+            for key in candidates:
+                _, _, other, expires_at, _ = self._entries[key]
+                if expires_at <= now:
+                    self._forget(key)
+                    continue
+                score = similarity(fingerprint, other)
+                if score >= best_similarity:
+                    best, best_similarity = key, score
+
+            if best is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self.counters["hits"] += 1
+            return json.loads(json.dumps(self._entries[best][4])), best_similarity
+
+    def put(self, predictor, version, text, scores):
+        if not self.eligible(text):
+            return
+        key = hashlib.sha256(f"{predictor}\0{version}\0{text_digest(text)}".encode("utf-8")).hexdigest()
+        fingerprint = simhash(text)
+        expires_at = time.time() + self.ttl
+        payload = json.dumps(scores)
+        with self._lock:
+            evicted = self._remember(key, predictor, version, fingerprint, expires_at, json.loads(payload))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO near_duplicate_scores (key, predictor, version, fingerprint, payload, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, predictor, version, f"{fingerprint:016x}", payload, expires_at),
+                )
+                self._conn.executemany("DELETE FROM near_duplicate_scores WHERE key = ?", [(k,) for k in evicted])
+                self._conn.commit()
+            self.counters["writes"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
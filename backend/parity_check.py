@@ -0,0 +1,70 @@
+import argparse
+import time
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from inference_backends import INFERENCE_BACKENDS, load_runner
+from predictors import NEWS_MODEL_PATH, JOB_MODEL_PATH
+
+MODEL_PATHS = {"news": NEWS_MODEL_PATH, "job": JOB_MODEL_PATH}
+
+SAMPLE_CORPUS = [
+    "Scientists at NASA confirmed the mission data after a two year study.",
+    "Shocking discovery: the government is hiding a miracle cure for cancer!",
+    "The city council approved the new budget on Tuesday after a long debate.",
+    "Inside source reveals aliens built an underground city beneath the desert.",
+    "Unemployment fell slightly last quarter according to the labour ministry.",
+    "Urgent hiring! Earn quick money from home, registration fee required.",
+    "We are looking for a senior backend engineer with five years of Python experience.",
+    "Limited slots, no experience needed, send bank details to secure your investment.",
+    "Join our data team as an analyst. Competitive salary and health benefits.",
+    "Work from home money guaranteed, hiring immediately, pay the fee today.",
+]
+
+
+def _score(runner, tokenizer, texts, batch_size):
+    probs = []
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(texts[start:start + batch_size], return_tensors="pt", truncation=True, max_length=512, padding=True)
+        probs.extend(runner.predict_proba(inputs))
+    return np.array(probs), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an optimized inference backend against the fp32 torch model.")
+    parser.add_argument("--model", choices=sorted(MODEL_PATHS), required=True)
+    parser.add_argument("--backend", choices=[b for b in INFERENCE_BACKENDS if b != "torch"], required=True)
+    parser.add_argument("--corpus", help="Text file with one sample per line (defaults to a small built-in corpus)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_CORPUS
+
+    path = MODEL_PATHS[args.model]
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    reference, reference_time = _score(load_runner(path, "torch"), tokenizer, texts, args.batch_size)
+    candidate_runner = load_runner(path, args.backend)
+    candidate, candidate_time = _score(candidate_runner, tokenizer, texts, args.batch_size)
+
+    diffs = np.abs(reference - candidate)
+    flipped = np.flatnonzero(reference.argmax(axis=1) != candidate.argmax(axis=1))
+    worst = int(diffs.max(axis=1).argmax())
+
+    print(f"Model: {args.model}  backend: {candidate_runner.backend}  samples: {len(texts)}")
+    print(f"Max probability difference: {diffs.max():.5f} (mean {diffs.mean():.5f})")
+    print(f"Label disagreements: {len(flipped)}/{len(texts)}")
+    for i in flipped[:10]:
+        print(f"  [{i}] fp32={reference[i].argmax()} {args.backend}={candidate[i].argmax()}  {texts[i][:80]!r}")
+    print(f"Largest difference on: {texts[worst][:80]!r}")
+    print(f"Throughput: fp32 {len(texts) / reference_time:.1f}/s, {args.backend} {len(texts) / candidate_time:.1f}/s "
+          f"({reference_time / candidate_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_text(text):
+    # Case is kept: the RoBERTa tokenizers are cased and the review rules look for ALL CAPS
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def text_digest(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def artifact_fingerprint(*paths):
+    """Cheap version string for model artifacts, based on file sizes and mtimes."""
+    h = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            files = [path]
+        for f in files:
+            if os.path.isfile(f):
+                st = os.stat(f)
+                h.update(f"{f}:{st.st_size}:{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _copy(result):
+    return dict(result, reasons=list(result["reasons"]))
+
+
+class PredictionCache:
+    """Size-bounded LRU of prediction results keyed by predictor, model version and text hash.
+
+    Concurrent misses for the same key are coalesced: the first caller computes
+    and every other caller waits for its result.
+    """
+
+    def __init__(self, max_entries=50000, ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _store(self, key, result):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else 0
+        self._entries[key] = (expires_at, _copy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, predictor, version, text):
+        key = (predictor, version, text_digest(text))
+        with self._lock:
+            result = self._lookup(key)
+            self.counters["hits" if result is not None else "misses"] += 1
+        return _copy(result) if result is not None else None
+
+    def put(self, predictor, version, text, result):
+        key = (predictor, version, text_digest(text))
+        with self._lock:
+            self._store(key, result)
+
+    def get_or_compute(self, predictor, version, text, compute, reports_complete=False):
+        """Cached result for `text`, computing it at most once across concurrent callers.
+
+        With `reports_complete`, `compute` returns `(result, complete)`; an
+        incomplete result (e.g. a fact check timed out) is handed to the
+        coalesced callers but not stored.
+        """
+        if self.max_entries <= 0:
+            return compute(text)[0] if reports_complete else compute(text)
+
+        key = (predictor, version, text_digest(text))
+        with self._lock:
+            result = self._lookup(key)
+            if result is not None:
+                self.counters["hits"] += 1
+                return _copy(result)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not owner:
+            return _copy(future.result())
+
+        try:
+            result = compute(text)
+            complete = True
+            if reports_complete:
+                result, complete = result
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if complete:
+                self._store(key, result)
+            del self._inflight[key]
+        future.set_result(result)
+        return _copy(result)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), inflight=len(self._inflight))
@@ -1,11 +1,33 @@
+import hashlib
 import os
 import pickle
-import torch
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import joblib
+from transformers import AutoTokenizer
 from fastapi import HTTPException
-import requests
+from sklearn.utils import check_array
+
+import metrics
+from batching import MicroBatcher
+from registry import ModelRegistry
+from artifacts import resolve
+from router import content_router
+from inference_backends import load_runner
+from windows import classify_long
+from rule_engine import load_rules
+from predcache import PredictionCache, artifact_fingerprint, text_digest
+from neardup import NearDuplicateIndex
+from factcheck import (
+    FACT_CHECK_SOURCES,
+    FACT_CHECK_WORKERS,
+    fact_cache,
+    start_fact_checks,
+    collect_fact_checks,
+    iter_fact_checks,
+)
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,265 +38,357 @@ REVIEW_RF_PATH = os.path.join(MODELS_DIR, "rf_review", "reviews_rf.pkl")
 REVIEW_TFIDF_PATH = os.path.join(MODELS_DIR, "rf_review", "reviews_tfidf.pkl")
 JOB_MODEL_PATH = os.path.join(MODELS_DIR, "roberta_job")
 
-# Global model holders
-news_model = None
-news_tokenizer = None
-review_rf = None
-review_tfidf = None
-job_model = None
-job_tokenizer = None
-
-def load_models():
-    global news_model, news_tokenizer, review_rf, review_tfidf, job_model, job_tokenizer
-    
-    # Load News Model
+# Micro-batching of concurrent RoBERTa requests
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+
+# Chunk size for explicit bulk requests
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "32"))
+
+# News bulk chunks are capped so every fact-check lookup of a chunk gets an executor thread right away
+NEWS_BULK_CHUNK = max(1, min(BULK_BATCH_SIZE, FACT_CHECK_WORKERS // len(FACT_CHECK_SOURCES)))
+
+# Sliding-window scoring of documents longer than 512 tokens
+LONG_TEXT_MODE = os.getenv("LONG_TEXT_MODE", "0") == "1"
+LONG_TEXT_OVERLAP = int(os.getenv("LONG_TEXT_OVERLAP", "128"))
+LONG_TEXT_AGGREGATE = os.getenv("LONG_TEXT_AGGREGATE", "max")
+LONG_TEXT_EARLY_EXIT = float(os.getenv("LONG_TEXT_EARLY_EXIT", "0.9"))
+
+# Keyword / heuristic rules, compiled once per domain
+RULES = load_rules()
+
+# Prediction result cache (0 entries disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "50000"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "3600"))
+
+prediction_cache = PredictionCache(max_entries=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL_S)
+
+# Near-duplicate reuse of review and job verdicts (0 entries disables it)
+NEARDUP_INDEX_SIZE = int(os.getenv("NEARDUP_INDEX_SIZE", "0"))
+NEARDUP_THRESHOLD = float(os.getenv("NEARDUP_THRESHOLD", "0.9"))
+NEARDUP_TTL_S = float(os.getenv("NEARDUP_TTL_S", "86400"))
+NEARDUP_MIN_WORDS = int(os.getenv("NEARDUP_MIN_WORDS", "8"))
+NEARDUP_INDEX_PATH = os.getenv("NEARDUP_INDEX_PATH", "")
+
+near_duplicates = NearDuplicateIndex(
+    max_entries=NEARDUP_INDEX_SIZE,
+    threshold=NEARDUP_THRESHOLD,
+    ttl=NEARDUP_TTL_S,
+    path=NEARDUP_INDEX_PATH or None,
+    min_words=NEARDUP_MIN_WORDS,
+) if NEARDUP_INDEX_SIZE > 0 else None
+
+def _after_fork_in_child():
+    global _forest, _forest_lock
+    # The parent's forest threads don't exist here, and its sizing predates worker pinning
+    _forest, _forest_lock = None, threading.Lock()
+    if near_duplicates is not None:
+        near_duplicates.reopen()
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+# Artifact fingerprints, part of every cache key so retrained models invalidate old entries
+MODEL_VERSIONS = {}
+
+# Memory budget for resident models (0 = unlimited)
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# After a failed load, requests get a 503 right away for this long instead of retrying the load
+MODEL_LOAD_RETRY_S = float(os.getenv("MODEL_LOAD_RETRY_S", "60"))
+# Models loaded and warmed before /readyz reports ready: "all", "none" (load on first use) or a comma-separated list
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "all").strip().lower()
+
+# Inference backend per RoBERTa model: torch (fp32 eager), int8 or onnx
+NEWS_MODEL_BACKEND = os.getenv("NEWS_MODEL_BACKEND", "torch")
+JOB_MODEL_BACKEND = os.getenv("JOB_MODEL_BACKEND", "torch")
+
+# Poll interval of the model watcher, and whether it reloads models whose artifacts changed on disk
+MODEL_WATCH_INTERVAL_S = float(os.getenv("MODEL_WATCH_INTERVAL_S", "5"))
+MODEL_WATCH_FILES = os.getenv("MODEL_WATCH_FILES", "0") == "1"
+
+# Warm-up inference runs per model after it is preloaded
+WARMUP_RUNS = int(os.getenv("WARMUP_RUNS", "1"))
+WARMUP_TEXT = "Officials confirmed the report on Tuesday after reviewing the data."
+
+# Review forest: trees are split across this many threads for batches of at least REVIEW_PARALLEL_MIN_ROWS
+# (0 = the cores this process may run on, so pinned inference workers only use their own slice)
+REVIEW_FOREST_WORKERS = int(os.getenv("REVIEW_FOREST_WORKERS", "0"))
+REVIEW_PARALLEL_MIN_ROWS = int(os.getenv("REVIEW_PARALLEL_MIN_ROWS", "64"))
+
+# Created on first use, after any worker pinning
+_forest = None
+_forest_lock = threading.Lock()
+
+def _forest_pool():
+    """Return `(executor, threads)` for splitting the review forest in this process."""
+    global _forest
+    with _forest_lock:
+        if _forest is None:
+            threads = REVIEW_FOREST_WORKERS or len(os.sched_getaffinity(0))
+            _forest = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="forest"), max(1, threads)
+        return _forest
+
+# Cascade mode: score rules (and fact checks for news) first and skip RoBERTa when they already decide the label
+CASCADE_MODE = os.getenv("CASCADE_MODE", "0") == "1"
+CASCADE_SKIP_REASON = "Base AI Model skipped: cheaper signals already decide the label"
+
+CASCADE_DECISIONS = metrics.register(
+    metrics.Counter("trustlens_cascade_decisions_total", "Cascade-mode predictions by the stage that decided the label")
+)
+
+# `vocab_id` hashes the tokenizer files; models with equal ids can share one encoding
+TextClassifier = namedtuple("TextClassifier", ["runner", "tokenizer", "vocab_id"], defaults=[None])
+ReviewModels = namedtuple("ReviewModels", ["rf", "tfidf"])
+
+TOKENIZER_FILES = ("vocab.json", "merges.txt", "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json")
+
+def _vocab_id(path, tokenizer):
+    h = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    for name in TOKENIZER_FILES:
+        file_path = os.path.join(path, name)
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                h.update(name.encode("utf-8") + b"\0" + hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
+
+def _load_text_classifier(label, path, backend):
     try:
-        if os.path.exists(NEWS_MODEL_PATH):
-            print(f"Loading News model from {NEWS_MODEL_PATH}...")
-            news_tokenizer = AutoTokenizer.from_pretrained(NEWS_MODEL_PATH)
-            news_model = AutoModelForSequenceClassification.from_pretrained(NEWS_MODEL_PATH)
-            news_model.eval()
-            print("News model loaded.")
+        if os.path.exists(path):
+            print(f"Loading {label} model from {path} ({backend} backend)...")
+            tokenizer = AutoTokenizer.from_pretrained(path)
+            runner = load_runner(path, backend)
+            print(f"{label} model loaded.")
+            return TextClassifier(runner, tokenizer, _vocab_id(path, tokenizer)), runner.size_bytes()
         else:
-            print(f"Warning: News model not found at {NEWS_MODEL_PATH}")
+            print(f"Warning: {label} model not found at {path}")
     except Exception as e:
-        print(f"Error loading News model: {e}")
+        print(f"Error loading {label} model: {e}")
+    return None
+
+def _review_paths():
+    # Both pickles live in one (possibly versioned) directory
+    directory, _ = resolve(os.path.dirname(REVIEW_RF_PATH))
+    return os.path.join(directory, os.path.basename(REVIEW_RF_PATH)), os.path.join(directory, os.path.basename(REVIEW_TFIDF_PATH))
+
+def _load_news_model():
+    return _load_text_classifier("News", resolve(NEWS_MODEL_PATH)[0], NEWS_MODEL_BACKEND)
+
+def _load_job_model():
+    return _load_text_classifier("Job", resolve(JOB_MODEL_PATH)[0], JOB_MODEL_BACKEND)
 
-    # Load Review Model
+def _load_review_models():
     try:
-        print(f"Checking Review model paths: {REVIEW_RF_PATH}, {REVIEW_TFIDF_PATH}")
-        if os.path.exists(REVIEW_RF_PATH) and os.path.exists(REVIEW_TFIDF_PATH):
-            print(f"Loading Review models from {MODELS_DIR}...")
-            with open(REVIEW_RF_PATH, 'rb') as f:
+        rf_path, tfidf_path = _review_paths()
+        print(f"Checking Review model paths: {rf_path}, {tfidf_path}")
+        if os.path.exists(rf_path) and os.path.exists(tfidf_path):
+            print(f"Loading Review models from {os.path.dirname(rf_path)}...")
+            with open(rf_path, 'rb') as f:
                 review_rf = pickle.load(f)
-            with open(REVIEW_TFIDF_PATH, 'rb') as f:
+            with open(tfidf_path, 'rb') as f:
                 review_tfidf = pickle.load(f)
             print("Review models loaded.")
+            # Pickle size is a reasonable proxy for the in-memory size of the forest
+            size_bytes = os.path.getsize(rf_path) + os.path.getsize(tfidf_path)
+            return ReviewModels(review_rf, review_tfidf), size_bytes
         else:
-            print(f"Warning: Review models not found. RF exists: {os.path.exists(REVIEW_RF_PATH)}, TFIDF exists: {os.path.exists(REVIEW_TFIDF_PATH)}")
+            print(f"Warning: Review models not found. RF exists: {os.path.exists(rf_path)}, TFIDF exists: {os.path.exists(tfidf_path)}")
     except Exception as e:
         print(f"Error loading Review models: {e}")
         import traceback
         traceback.print_exc()
+    return None
 
-    # Load Job Model
+def _text_model_files(path):
+    directory = resolve(path)[0]
+    # Derived int8/ONNX exports are left out so creating them doesn't look like a new version
+    return [os.path.join(directory, name) for name in ("config.json", "model.safetensors", "pytorch_model.bin", "vocab.json", "merges.txt")]
+
+def model_version(name):
+    """Label and fingerprint of the artifacts `name` would load right now."""
+    base = {"news": NEWS_MODEL_PATH, "job": JOB_MODEL_PATH, "review": os.path.dirname(REVIEW_RF_PATH)}[name]
     try:
-        if os.path.exists(JOB_MODEL_PATH):
-            print(f"Loading Job model from {JOB_MODEL_PATH}...")
-            job_tokenizer = AutoTokenizer.from_pretrained(JOB_MODEL_PATH)
-            job_model = AutoModelForSequenceClassification.from_pretrained(JOB_MODEL_PATH)
-            job_model.eval()
-            print("Job model loaded.")
+        label = resolve(base)[1]
+        files = _review_paths() if name == "review" else _text_model_files(base)
+    except FileNotFoundError:
+        return ""
+    return f"{label}-{artifact_fingerprint(*files)}"
+
+def _version_swapped(name, version):
+    # Runs under the registry lock, so /models never pairs a new model with the old cache version
+    MODEL_VERSIONS[name] = version
+
+model_registry = ModelRegistry(
+    budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+    retry_after_s=MODEL_LOAD_RETRY_S,
+    on_swap=_version_swapped,
+)
+model_registry.register("news", _load_news_model, version=lambda: model_version("news"))
+model_registry.register("review", _load_review_models, version=lambda: model_version("review"))
+model_registry.register("job", _load_job_model, version=lambda: model_version("job"))
+
+def get_model(name):
+    model = model_registry.get(name)
+    if model is None:
+        raise HTTPException(status_code=503, detail=f"{name.capitalize()} model not loaded")
+    return model
+
+def _batched_classify(name):
+    def infer(texts):
+        return classify(get_model(name), texts, name)
+    return infer
+
+news_batcher = MicroBatcher(
+    _batched_classify("news"),
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    name="news-batcher",
+)
+job_batcher = MicroBatcher(
+    _batched_classify("job"),
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    name="job-batcher",
+)
+
+def warm_up(name, model=None):
+    """Run throwaway inference so the first real request doesn't pay for lazy initialisation."""
+    model = model or get_model(name)
+    for _ in range(WARMUP_RUNS):
+        if name == "review":
+            _review_scores(model, [WARMUP_TEXT])
         else:
-            print(f"Warning: Job model not found at {JOB_MODEL_PATH}")
-    except Exception as e:
-        print(f"Error loading Job model: {e}")
+            classify(model, [WARMUP_TEXT], name)
+
+def preload_models(names, warmup=True):
+    """Load `names` in parallel, warming each one up as soon as it is loaded; returns the names that failed to load."""
+    def load(name):
+        started = time.perf_counter()
+        if model_registry.get(name) is None:
+            return name
+        if warmup:
+            warm_up(name)
+        print(f"{name} model ready in {time.perf_counter() - started:.1f}s")
+        return None
+
+    if not names:
+        return []
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-load") as pool:
+        return [name for name in pool.map(load, names) if name is not None]
+
+def _preload_names():
+    if PRELOAD_MODELS == "all":
+        return model_registry.names()
+    if PRELOAD_MODELS == "none":
+        return []
+    return [n.strip() for n in PRELOAD_MODELS.split(",") if n.strip()]
+
+def load_models(warmup=True, names=None):
+    """Load and warm `names` (default PRELOAD_MODELS); returns the names that could not be loaded."""
+    for name in model_registry.names():
+        MODEL_VERSIONS[name] = model_version(name)
+
+    # Anything not preloaded is loaded by the registry on first use
+    return preload_models(_preload_names() if names is None else names, warmup)
+
+def reload_model(name):
+    """Load the current artifacts of `name` in the background and swap them in once warmed up."""
+    info = model_registry.reload(name, prepare=lambda model: warm_up(name, model))
+    if info is None:
+        raise HTTPException(status_code=503, detail=f"Could not load the new {name} model; still serving the old one")
+    print(f"{name} model version {info['version']} live after {info['load_seconds']}s")
+    return info
+
+def start_model_watcher(generations=None):
+    """Reload models whose artifacts changed on disk (MODEL_WATCH_FILES) or whose reload was requested.
+
+    `generations` is an optional shared array, one counter per registered
+    model, that other processes bump to ask for a reload.
+    """
+    if not MODEL_WATCH_FILES and generations is None:
+        return None
+    names = model_registry.names()
+    seen = list(generations) if generations is not None else None
+
+    def watch():
+        while True:
+            time.sleep(MODEL_WATCH_INTERVAL_S)
+            for i, name in enumerate(names):
+                requested = generations is not None and generations[i] != seen[i]
+                if requested:
+                    seen[i] = generations[i]
+                changed = MODEL_WATCH_FILES and model_registry.is_loaded(name) and model_registry.available_version(name) != model_registry.version(name)
+                if requested or changed:
+                    try:
+                        reload_model(name)
+                    except Exception as e:
+                        print(f"Error reloading {name} model: {e}")
+
+    thread = threading.Thread(target=watch, name="model-watcher", daemon=True)
+    thread.start()
+    return thread
+
+def classify(classifier, texts, name=None):
+    """Return per-text class probabilities for `texts`.
+
+    By default this is one padded forward pass over inputs truncated to 512
+    tokens. In long-text mode documents are scored by sliding windows instead.
+    """
+    domain = name or "unknown"
+    if LONG_TEXT_MODE and name in ML_SCORE_FUNCTIONS:
+        with metrics.stage(domain, "forward"):
+            return classify_long(
+                classifier, texts, ML_SCORE_FUNCTIONS[name], BULK_BATCH_SIZE,
+                overlap=LONG_TEXT_OVERLAP, aggregate=LONG_TEXT_AGGREGATE, early_exit=LONG_TEXT_EARLY_EXIT,
+            )
+    with metrics.stage(domain, "tokenize"):
+        inputs = classifier.tokenizer(texts, return_tensors="pt", truncation=True, max_length=512, padding=True)
+    with metrics.stage(domain, "forward"):
+        return classifier.runner.predict_proba(inputs)
+
+def _top_class(probs):
+    predicted_class = int(np.argmax(probs))
+    return float(probs[predicted_class]), predicted_class
 
 def apply_fake_news_rules(text):
-    rules = {
-        "fake_keywords": [
-            "cure cancer", "miracle", "aliens", "alien", "secret", "government hiding",
-            "underground city", "immortality", "teleported", "inside source", "conspiracy",
-            "cover up", "truth they don't want you to know", "shocking discovery"
-        ]
-    }
-    score = 0.0
-    reasons = []
-    found_keywords = []
-
-    for kw in rules["fake_keywords"]:
-        if kw in text.lower():
-            found_keywords.append(kw)
-
-    if found_keywords:
-        # Cap score contribution from keywords
-        contribution = min(0.4, len(found_keywords) * 0.15)
-        score += contribution
-        reasons.append(f"Suspicious keywords detected: {', '.join(f'{k}' for k in found_keywords)} (+{contribution:.0%} risk)")
-
-    return score, reasons
+    result = RULES["news"].evaluate(text)
+    return result.score, result.reasons
 
 def apply_fake_review_rules(text):
-    text_lower = text.lower()
-    score = 0.0
-    reasons = []
-
-    # 1. Too short
-    if len(text.split()) < 8:
-        contribution = 0.25
-        score += contribution
-        reasons.append(f"Review is unusually short (+{contribution:.0%} risk)")
-
-    # 2. Too many exclamation marks
-    if text.count("!") >= 3:
-        contribution = 0.35
-        score += contribution
-        reasons.append(f"Multiple exclamation marks detected (+{contribution:.0%} risk)")
-
-    # 3. Excessive positivity
-    strong_positive = [
-        "best product ever", "perfect", "absolutely perfect",
-        "life changing", "amazing amazing", "incredible deal",
-        "buy now", "highly recommend to everyone"
-    ]
-    found_positive = []
-    for phrase in strong_positive:
-        if phrase in text_lower:
-            found_positive.append(phrase)
-            
-    if found_positive:
-        contribution = 0.40
-        score += contribution
-        reasons.append(f"Exaggerated phrases: {', '.join(f'{p}' for p in found_positive)} (+{contribution:.0%} risk)")
-
-    # 4. All caps segments
-    words = text.split()
-    if any(len(w) > 3 and w.isupper() for w in words):
-        contribution = 0.30
-        score += contribution
-        reasons.append(f"Contains ALL CAPS shouting (+{contribution:.0%} risk)")
-
-    # 5. Very unnatural repetition
-    if len(set(words)) < len(words) * 0.4:
-        contribution = 0.25
-        score += contribution
-        reasons.append(f"Unnatural repetition in review (+{contribution:.0%} risk)")
-
-    return score, reasons
+    result = RULES["review"].evaluate(text)
+    return result.score, result.reasons
 
 def apply_fake_job_rules(text):
-    score = 0.0
-    reasons = []
-
-    scam_terms = [
-        "registration fee", "send bank details", "earn", "₹", "limited slots",
-        "no experience needed", "work from home money", "quick money", "investment",
-        "hiring immediately", "urgent hiring"
-    ]
-    found_scam = []
-
-    for term in scam_terms:
-        if term in text.lower():
-            found_scam.append(term)
-            
-    if found_scam:
-        contribution = min(0.5, len(found_scam) * 0.20)
-        score += contribution
-        reasons.append(f"Scam indicators: {', '.join(f'{t}' for t in found_scam)} (+{contribution:.0%} risk)")
-
-    return score, reasons
-
-def check_news_source_with_mbc(text):
-    url = "https://mediabiasfactcheck.p.rapidapi.com/search"
-    headers = {
-        "X-RapidAPI-Key": os.getenv("MBFC_API_KEY"),
-        "X-RapidAPI-Host": os.getenv("MBFC_API_HOST")
-    }
-    query = {"query": text}
-
-    try:
-        response = requests.get(url, headers=headers, params=query)
-        data = response.json()
-
-        if len(data) == 0:
-            return 0.0, ["No matching source in MediaBiasFactCheck"]
-
-        reliability = data[0].get("factual", "Mixed")
-
-        # Convert factual rating into score
-        mapping = {
-            "High": -0.3,     # reduces fake score
-            "Mostly Factual": -0.2,
-            "Mixed": 0.0,
-            "Low": 0.2,       # increases fake score
-            "Very Low": 0.3,
-            "Fake News": 0.4,
-            "Satire": 0.3
-        }
+    result = RULES["job"].evaluate(text)
+    return result.score, result.reasons
 
-        score = mapping.get(reliability, 0.0)
-        sign = "+" if score > 0 else ""
-        reason = f"MediaBiasFactCheck rating: {reliability} ({sign}{score:.0%} risk)"
-
-        return score, [reason]
-
-    except Exception as e:
-        # API seems to be down or invalid, return empty to not affect score
-        return 0.0, []
-
-def check_google_fact_check(text):
-    api_key = os.getenv("GOOGLE_API_KEY")
-    url = "https://factchecktools.googleapis.com/v1alpha1/claims:search"
-    params = {
-        "key": api_key,
-        "query": text,
-        "languageCode": "en"
-    }
-    
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        if "claims" not in data or not data["claims"]:
-            return 0.0, []
-            
-        # Analyze the first claim found
-        claim = data["claims"][0]
-        claim_review = claim.get("claimReview", [])[0] if claim.get("claimReview") else {}
-        publisher = claim_review.get("publisher", {}).get("name", "Unknown")
-        rating = claim_review.get("textualRating", "Unknown")
-        
-        score = 0.0
-        
-        # Simple heuristic for rating
-        rating_lower = rating.lower()
-        if "false" in rating_lower or "pants on fire" in rating_lower or "fake" in rating_lower:
-            score = 0.4 # Strong signal for fake
-        elif "true" in rating_lower or "correct" in rating_lower:
-            score = -0.4 # Strong signal for real
-        elif "mixture" in rating_lower or "misleading" in rating_lower:
-            score = 0.2
-            
-        sign = "+" if score > 0 else ""
-        reason = f"Google Fact Check ({publisher}): {rating} ({sign}{score:.0%} risk)"
-            
-        return score, [reason]
-
-    except Exception as e:
-        return 0.0, [f"Google Fact Check error: {str(e)}"]
-
-def predict_news(text: str):
-    if not news_model or not news_tokenizer:
-        raise HTTPException(status_code=503, detail="News model not loaded")
-    
-    inputs = news_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = news_model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        confidence, predicted_class = torch.max(probs, dim=-1)
+def _news_ml_score(probs):
+    confidence, predicted_class = _top_class(probs)
     
     # Assuming 3 classes: 0=True, 1=Misleading, 2=Fake
     labels = ["True", "Misleading", "Fake"] 
     
     # Calculate ML Score (0-1)
     ml_fake_score = 0.0
-    if predicted_class.item() == 2: # Fake
-        ml_fake_score = float(confidence.item())
-    elif predicted_class.item() == 1: # Misleading
-        ml_fake_score = 0.5 + (float(confidence.item()) * 0.2)
+    if predicted_class == 2: # Fake
+        ml_fake_score = confidence
+    elif predicted_class == 1: # Misleading
+        ml_fake_score = 0.5 + (confidence * 0.2)
     else: # True
-        ml_fake_score = 1.0 - float(confidence.item())
+        ml_fake_score = 1.0 - confidence
+    return ml_fake_score
+
+def _news_result(text, probs, fact_checks, rules=None):
+    ml_fake_score = _news_ml_score(probs)
 
     ml_reason = f"Base AI Model risk score: {ml_fake_score:.1%}"
 
-    # Apply Rules
-    rule_score, rule_reasons = apply_fake_news_rules(text)
+    # Apply Rules (one pass also flags science reporting)
+    if rules is None:
+        with metrics.stage("news", "rules"):
+            rules = RULES["news"].evaluate(text)
+    rule_score, rule_reasons = rules.score, rules.reasons
     
-    # Apply Fact Check (MBC)
-    mbc_score, mbc_reasons = check_news_source_with_mbc(text)
-
-    # Apply Google Fact Check
-    google_score, google_reasons = check_google_fact_check(text)
+    # Fact Check (MBC) and Google Fact Check, collected by the caller
+    (mbc_score, mbc_reasons), (google_score, google_reasons) = fact_checks
 
     # Final Score Calculation
     final_score = ml_fake_score + rule_score + mbc_score + google_score
@@ -283,12 +397,7 @@ def predict_news(text: str):
     prediction = "FAKE" if final_score >= 0.6 else "REAL"
     
     # Override for Science News
-    science_keywords = [
-        "research", "isro", "nasa", "study", "scientists",
-        "experiment", "analysis", "data", "mission"
-    ]
-
-    if any(word in text.lower() for word in science_keywords):
+    if "science" in rules.flags:
         if prediction == "FAKE" and final_score < 0.80:
             prediction = "REAL"
             final_score = round(final_score * 0.5, 3)
@@ -306,60 +415,46 @@ def predict_news(text: str):
         "reasons": [ml_reason] + rule_reasons + mbc_reasons + google_reasons
     }
 
-def predict_review(text: str):
-    if not review_rf or not review_tfidf:
-        raise HTTPException(status_code=503, detail="Review model not loaded")
-    
-    # Transform text
-    text_vectorized = review_tfidf.transform([text])
-    prediction = review_rf.predict(text_vectorized)[0]
-    
-    try:
-        probs = review_rf.predict_proba(text_vectorized)
-        confidence = float(np.max(probs))
+def _review_result(prediction, probs, rules):
+    if probs is not None:
         # Assuming class 1 is Fake
-        ml_fake_score = float(probs[0][1]) if len(probs[0]) > 1 else (1.0 if prediction == 1 else 0.0)
-    except:
-        confidence = 1.0 # Fallback if predict_proba not available
+        ml_fake_score = float(probs[1]) if len(probs) > 1 else (1.0 if prediction == 1 else 0.0)
+    else:
         ml_fake_score = 1.0 if prediction == 1 else 0.0
         
     ml_label = "Fake" if ml_fake_score > 0.5 else "Real"
     ml_reason = f"Base AI Model risk score: {ml_fake_score:.1%}"
 
-    # Apply Rules
-    rule_score, rule_reasons = apply_fake_review_rules(text)
-
     # Final Score
-    final_score = min(1.0, ml_fake_score + rule_score)
+    final_score = min(1.0, ml_fake_score + rules.score)
 
     label = "Fake" if final_score >= 0.6 else "Real"
     
     return {
         "label": label, 
         "confidence": final_score,
-        "reasons": [ml_reason] + rule_reasons
+        "reasons": [ml_reason] + rules.reasons
     }
 
-def predict_job(text: str):
-    if not job_model or not job_tokenizer:
-        raise HTTPException(status_code=503, detail="Job model not loaded")
-    
-    inputs = job_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = job_model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        confidence, predicted_class = torch.max(probs, dim=-1)
+def _job_ml_score(probs):
+    confidence, predicted_class = _top_class(probs)
         
     # Binary: Real / Fake
     labels = ["Real", "Fake"]
     
     # Calculate ML Fake Score
-    ml_fake_score = float(confidence.item()) if predicted_class.item() == 1 else (1.0 - float(confidence.item()))
+    return confidence if predicted_class == 1 else (1.0 - confidence)
+
+def _job_result(text, probs, rules=None):
+    ml_fake_score = _job_ml_score(probs)
 
     ml_reason = f"Base AI Model risk score: {ml_fake_score:.1%}"
 
     # Apply Rules
-    rule_score, rule_reasons = apply_fake_job_rules(text)
+    if rules is None:
+        with metrics.stage("job", "rules"):
+            rules = RULES["job"].evaluate(text)
+    rule_score, rule_reasons = rules.score, rules.reasons
 
     # Final Score
     final_score = ml_fake_score + rule_score
@@ -372,3 +467,487 @@ def predict_job(text: str):
         "confidence": final_score,
         "reasons": [ml_reason] + rule_reasons
     }
+
+def _cascade_decision(partial_score, science=False):
+    """Return True (fake) or False (real) when no ML score in [0, 1] can change the label, else None.
+
+    Mirrors the fusion above: final = clamp(ml + partial), fake at >= 0.6, and
+    the science override turns fakes below 0.8 into reals.
+    """
+    if partial_score >= 0.8 or (partial_score >= 0.6 and not science):
+        return True
+    if partial_score + 1.0 < 0.6:
+        return False
+    return None
+
+def _cascade_result(label, partial_score, reasons):
+    # The skipped model contributes nothing to the reported score
+    return {
+        "label": label,
+        "confidence": max(0.0, min(partial_score, 1.0)),
+        "reasons": [CASCADE_SKIP_REASON] + reasons
+    }
+
+def _cascade_news(rules, fact_checks):
+    """The result when rules and fact checks settle the label; None when the model score is needed."""
+    partial = rules.score + sum(score for score, _ in fact_checks)
+    decision = _cascade_decision(partial, "science" in rules.flags)
+    if decision is None:
+        return None
+    reasons = rules.reasons + [reason for _, check_reasons in fact_checks for reason in check_reasons]
+    return _cascade_result("FAKE" if decision else "REAL", partial, reasons)
+
+def _settle_news(text, speculative, rules, fact_checks):
+    """Finish a cascade-mode news prediction whose forward pass was submitted speculatively.
+
+    The cheap stages' verdict is only used if the pass can still be dropped;
+    once the model has run its score is fused in like outside cascade mode.
+    """
+    decided = _cascade_news(rules, fact_checks)
+    if decided is not None and speculative.cancel():
+        CASCADE_DECISIONS.inc(domain="news", stage="fact_checks")
+        return decided
+    CASCADE_DECISIONS.inc(domain="news", stage="model")
+    with metrics.stage("news", "inference"):
+        probs = speculative.result()
+    return _news_result(text, probs, fact_checks, rules)
+
+def _cascade_job(rules):
+    """Results for the job posts whose rule score alone settles the label; None elsewhere."""
+    results = []
+    for r in rules:
+        decision = _cascade_decision(r.score)
+        if decision is None:
+            CASCADE_DECISIONS.inc(domain="job", stage="model")
+            results.append(None)
+        else:
+            CASCADE_DECISIONS.inc(domain="job", stage="rules")
+            results.append(_cascade_result("Fake" if decision else "Real", r.score, list(r.reasons)))
+    return results
+
+# Per-window fake score used to aggregate and early-exit in long-text mode
+ML_SCORE_FUNCTIONS = {"news": _news_ml_score, "job": _job_ml_score}
+
+def _classify_chunked(classifier, texts, name):
+    if LONG_TEXT_MODE:
+        return classify(classifier, texts, name)
+    # Chunk in length order so each chunk pads to similar lengths
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    probs = [None] * len(texts)
+    for start in range(0, len(order), BULK_BATCH_SIZE):
+        idx = order[start:start + BULK_BATCH_SIZE]
+        for i, p in zip(idx, classify(classifier, [texts[i] for i in idx], name)):
+            probs[i] = p
+    return probs
+
+def _forest_proba(rf, X):
+    """Average the trees' class probabilities, splitting the trees across threads for large batches."""
+    trees = getattr(rf, "estimators_", None)
+    if trees is None or getattr(rf, "n_outputs_", 1) != 1:
+        return rf.predict_proba(X)
+
+    # Convert once to what the trees expect instead of once per tree
+    X = check_array(X, dtype=np.float32, accept_sparse="csr")
+    executor, threads = _forest_pool()
+    workers = threads if X.shape[0] >= REVIEW_PARALLEL_MIN_ROWS else 1
+    groups = [g for g in np.array_split(np.arange(len(trees)), max(1, workers)) if len(g)]
+
+    def partial_sum(group):
+        total = trees[group[0]].predict_proba(X, check_input=False)
+        for i in group[1:]:
+            total += trees[i].predict_proba(X, check_input=False)
+        return total
+
+    if len(groups) == 1:
+        return partial_sum(groups[0]) / len(trees)
+    return sum(executor.map(partial_sum, groups)) / len(trees)
+
+def _review_scores(models, texts):
+    # One transform over the whole batch
+    with metrics.stage("review", "tfidf"):
+        text_vectorized = models.tfidf.transform(texts)
+    with metrics.stage("review", "forest"):
+        # A single walk of the forest; the label is the most probable class
+        try:
+            probs = _forest_proba(models.rf, text_vectorized)
+            predictions = models.rf.classes_.take(np.argmax(probs, axis=1))
+        except AttributeError:
+            predictions = models.rf.predict(text_vectorized)
+            probs = [None] * len(texts) # Fallback if predict_proba not available
+    return predictions, probs
+
+def _predict_news(text):
+    """Return `(result, complete)`; `complete` is False when a fact check timed out or failed."""
+    get_model("news")
+    
+    # Network lookups run while the model forward pass is in progress
+    pending = start_fact_checks(text)
+    if CASCADE_MODE:
+        # The forward pass starts speculatively so slow lookups don't delay it; when the
+        # cheap stages decide first (e.g. cached fact checks) it is dropped before batching
+        speculative = news_batcher.submit_async(text)
+        with metrics.stage("news", "rules"):
+            rules = RULES["news"].evaluate(text)
+        fact_checks, complete = collect_fact_checks(pending)
+        return _settle_news(text, speculative, rules, fact_checks), complete
+    with metrics.stage("news", "inference"):
+        probs = news_batcher.submit(text)
+    fact_checks, complete = collect_fact_checks(pending)
+    return _news_result(text, probs, fact_checks), complete
+
+def _predict_news_batch(texts):
+    """Return a `(result, complete)` pair per text, as `_predict_news` does."""
+    classifier = get_model("news")
+    
+    results = []
+    for start in range(0, len(texts), NEWS_BULK_CHUNK):
+        # Deadlines start at submit time, so a chunk's lookups must all fit on the executor at once
+        chunk = texts[start:start + NEWS_BULK_CHUNK]
+        pending = [start_fact_checks(text) for text in chunk]
+        if CASCADE_MODE:
+            results.extend(_cascade_news_chunk(chunk, pending))
+            continue
+        probs = classify(classifier, chunk, "news")
+        with metrics.stage("news", "rules"):
+            rules = RULES["news"].evaluate_batch(chunk)
+        for text, p, fc, r in zip(chunk, probs, pending, rules):
+            fact_checks, complete = collect_fact_checks(fc)
+            results.append((_news_result(text, p, fact_checks, r), complete))
+    return results
+
+def _cascade_news_chunk(chunk, pending):
+    # Every row goes to the batcher up front so forward passes overlap the lookups;
+    # rows the cheap stages settle while still queued are dropped before they batch
+    speculative = [news_batcher.submit_async(text) for text in chunk]
+    with metrics.stage("news", "rules"):
+        rules = RULES["news"].evaluate_batch(chunk)
+    results = []
+    for text, future, r, fc in zip(chunk, speculative, rules, pending):
+        fact_checks, complete = collect_fact_checks(fc)
+        results.append((_settle_news(text, future, r, fact_checks), complete))
+    return results
+
+def _predict_review(text):
+    return _predict_review_batch([text])[0]
+
+def _plain_probs(probs):
+    # JSON-friendly copy of a model output for the near-duplicate index
+    return None if probs is None else [float(p) for p in probs]
+
+def _review_batch_scored(texts):
+    """Return `(result, scores)` pairs; `scores` holds the raw forest output for near-duplicate reuse."""
+    models = get_model("review")
+    
+    predictions, probs = _review_scores(models, texts)
+    with metrics.stage("review", "rules"):
+        rules = RULES["review"].evaluate_batch(texts)
+    return [
+        (_review_result(pred, p, r), {"prediction": np.asarray(pred).item(), "probs": _plain_probs(p)})
+        for pred, p, r in zip(predictions, probs, rules)
+    ]
+
+def _predict_review_batch(texts):
+    return [result for result, _ in _review_batch_scored(texts)]
+
+def _job_scored(text):
+    """Return `(result, scores)`; `scores` is None when the cascade decided without the model."""
+    get_model("job")
+    
+    if CASCADE_MODE:
+        with metrics.stage("job", "rules"):
+            rules = RULES["job"].evaluate(text)
+        decided = _cascade_job([rules])[0]
+        if decided is not None:
+            return decided, None
+        with metrics.stage("job", "inference"):
+            probs = job_batcher.submit(text)
+        return _job_result(text, probs, rules), {"probs": _plain_probs(probs)}
+
+    with metrics.stage("job", "inference"):
+        probs = job_batcher.submit(text)
+    return _job_result(text, probs), {"probs": _plain_probs(probs)}
+
+def _predict_job(text):
+    return _job_scored(text)[0]
+
+def _job_batch_scored(texts):
+    classifier = get_model("job")
+    
+    if CASCADE_MODE:
+        with metrics.stage("job", "rules"):
+            rules = RULES["job"].evaluate_batch(texts)
+        results = [(decided, None) for decided in _cascade_job(rules)]
+        undecided = [i for i, (r, _) in enumerate(results) if r is None]
+        if undecided:
+            probs = _classify_chunked(classifier, [texts[i] for i in undecided], "job")
+            for i, p in zip(undecided, probs):
+                results[i] = _job_result(texts[i], p, rules[i]), {"probs": _plain_probs(p)}
+        return results
+
+    probs = _classify_chunked(classifier, texts, "job")
+    with metrics.stage("job", "rules"):
+        rules = RULES["job"].evaluate_batch(texts)
+    return [(_job_result(text, p, r), {"probs": _plain_probs(p)}) for text, p, r in zip(texts, probs, rules)]
+
+def _predict_job_batch(texts):
+    return [result for result, _ in _job_batch_scored(texts)]
+
+def _fuse_near_duplicate(predictor, texts, scores, rules):
+    if predictor == "review":
+        return [_review_result(s["prediction"], s["probs"], r) for s, r in zip(scores, rules)]
+    return [_job_result(text, s["probs"], r) for text, s, r in zip(texts, scores, rules)]
+
+def _near_duplicate_batch(predictor, texts, score_batch):
+    """Reuse the model score of a recently scored near-identical text; the rules always run on the new text.
+
+    `score_batch` returns `(result, scores)` pairs; only `scores` (the model
+    output, or None when no model ran) is stored in the index.
+    """
+    if near_duplicates is None:
+        return [result for result, _ in score_batch(texts)]
+
+    version = MODEL_VERSIONS.get(predictor, "")
+    with metrics.stage(predictor, "near_duplicate"):
+        found = [near_duplicates.get(predictor, version, text) for text in texts]
+    results = [None] * len(texts)
+
+    hits = [i for i, match in enumerate(found) if match is not None]
+    if hits:
+        hit_texts = [texts[i] for i in hits]
+        with metrics.stage(predictor, "rules"):
+            rules = RULES[predictor].evaluate_batch(hit_texts)
+        fused = _fuse_near_duplicate(predictor, hit_texts, [found[i][0] for i in hits], rules)
+        for i, result in zip(hits, fused):
+            result["reasons"].append(f"Near-duplicate of previously scored content (similarity {found[i][1]:.0%})")
+            results[i] = result
+
+    missing = [i for i, match in enumerate(found) if match is None]
+    if missing:
+        for i, (result, scores) in zip(missing, score_batch([texts[i] for i in missing])):
+            if scores is not None:
+                near_duplicates.put(predictor, version, texts[i], scores)
+            results[i] = result
+    return results
+
+def _cached_batch(predictor, texts, compute_batch, reports_complete=False):
+    # With `reports_complete`, compute_batch returns `(result, complete)` pairs and incomplete results aren't cached
+    version = MODEL_VERSIONS.get(predictor, "")
+    results = [prediction_cache.get(predictor, version, text) for text in texts]
+
+    # Compute each distinct missing text once
+    missing = {}
+    for text, result in zip(texts, results):
+        if result is None:
+            missing.setdefault(text_digest(text), text)
+    if missing:
+        batch = compute_batch(list(missing.values()))
+        if not reports_complete:
+            batch = [(result, True) for result in batch]
+        computed = {}
+        for (digest, text), (result, complete) in zip(missing.items(), batch):
+            computed[digest] = result
+            if complete:
+                prediction_cache.put(predictor, version, text, result)
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                result = computed[text_digest(text)]
+                results[i] = dict(result, reasons=list(result["reasons"]))
+    return results
+
+def predict_news(text: str):
+    return prediction_cache.get_or_compute("news", MODEL_VERSIONS.get("news", ""), text, _predict_news, reports_complete=True)
+
+def predict_news_batch(texts):
+    return _cached_batch("news", texts, _predict_news_batch, reports_complete=True)
+
+def news_probabilities(text):
+    get_model("news")
+    with metrics.stage("news", "inference"):
+        return news_batcher.submit(text)
+
+def _stream_update(text, probs, fact_checks, rules):
+    # Lookups that have not answered yet count as no contribution for now
+    current = _news_result(text, probs, [c if c is not None else (0.0, []) for c in fact_checks], rules)
+    return {"label": current["label"], "confidence": current["confidence"]}
+
+def predict_news_stream(text, probabilities=news_probabilities):
+    """Yield `(event, data)` pairs: the model and rule scores, then each fact check as it lands, then the final result.
+
+    Outside cascade mode the final result is what `predict_news` returns for
+    the same text. In cascade mode the stream always runs the model, so its
+    results are cached under their own key rather than next to cascade verdicts.
+    """
+    version = MODEL_VERSIONS.get("news", "")
+    cache_key = "news_stream" if CASCADE_MODE else "news"
+    cached = prediction_cache.get(cache_key, version, text)
+    if cached is not None:
+        yield "final", cached
+        return
+
+    pending = start_fact_checks(text)
+    probs = probabilities(text)
+    with metrics.stage("news", "rules"):
+        rules = RULES["news"].evaluate(text)
+    fact_checks = [None] * len(pending[2])
+    complete = True
+
+    ml_fake_score = _news_ml_score(probs)
+    yield "model", dict(
+        _stream_update(text, probs, fact_checks, rules),
+        ml_score=ml_fake_score,
+        rule_score=rules.score,
+        reasons=[f"Base AI Model risk score: {ml_fake_score:.1%}"] + rules.reasons,
+    )
+    for i, name, (score, reasons), ok in iter_fact_checks(pending):
+        fact_checks[i] = (score, reasons)
+        complete = complete and ok
+        yield "fact_check", dict(_stream_update(text, probs, fact_checks, rules), source=name, score=score, reasons=reasons)
+
+    result = _news_result(text, probs, fact_checks, rules)
+    if complete:
+        prediction_cache.put(cache_key, version, text, result)
+    yield "final", result
+
+def _review_or_near_duplicate(text):
+    return _near_duplicate_batch("review", [text], _review_batch_scored)[0]
+
+def _job_or_near_duplicate(text):
+    return _near_duplicate_batch("job", [text], lambda texts: [_job_scored(texts[0])])[0]
+
+def predict_review(text: str):
+    return prediction_cache.get_or_compute("review", MODEL_VERSIONS.get("review", ""), text, _review_or_near_duplicate)
+
+def predict_review_batch(texts):
+    return _cached_batch("review", texts, lambda batch: _near_duplicate_batch("review", batch, _review_batch_scored))
+
+def predict_job(text: str):
+    return prediction_cache.get_or_compute("job", MODEL_VERSIONS.get("job", ""), text, _job_or_near_duplicate)
+
+def predict_job_batch(texts):
+    return _cached_batch("job", texts, lambda batch: _near_duplicate_batch("job", batch, _job_batch_scored))
+
+AUTO_DOMAINS = ("news", "review", "job")
+
+def _classify_shared(classifiers, texts, rows):
+    """Probabilities per RoBERTa domain, tokenizing each text once per group of models sharing a vocabulary.
+
+    `rows[domain]` lists the indices of `texts` that domain needs.
+    """
+    probs = {domain: {} for domain in rows}
+    groups = {}
+    for domain in rows:
+        key = classifiers[domain].vocab_id if not LONG_TEXT_MODE else None
+        groups.setdefault(key or domain, []).append(domain)
+
+    for domains in groups.values():
+        needed = sorted({i for d in domains for i in rows[d]}, key=lambda i: len(texts[i]))
+        tokenizer = classifiers[domains[0]].tokenizer
+        for start in range(0, len(needed), BULK_BATCH_SIZE):
+            chunk = needed[start:start + BULK_BATCH_SIZE]
+            if len(domains) == 1:
+                for i, p in zip(chunk, classify(classifiers[domains[0]], [texts[i] for i in chunk], domains[0])):
+                    probs[domains[0]][i] = p
+                continue
+            with metrics.stage("auto", "tokenize"):
+                inputs = tokenizer([texts[i] for i in chunk], return_tensors="pt", truncation=True, max_length=512, padding=True)
+            position = {i: n for n, i in enumerate(chunk)}
+            for domain in domains:
+                wanted = [i for i in chunk if i in rows[domain]]
+                if not wanted:
+                    continue
+                index = [position[i] for i in wanted]
+                subset = inputs if len(index) == len(chunk) else {k: v[index] for k, v in inputs.items()}
+                with metrics.stage(domain, "forward"):
+                    for i, p in zip(wanted, classifiers[domain].runner.predict_proba(subset)):
+                        probs[domain][i] = p
+    return probs
+
+def predict_auto_batch(texts, run_all=False):
+    """Route each text to the predictors it needs (or all of them) and return per-domain verdicts.
+
+    Each verdict is the one the matching /predict/<domain> endpoint gives
+    without the cascade and near-duplicate shortcuts.
+    """
+    routes = []
+    with metrics.stage("auto", "route"):
+        for text in texts:
+            domains, scores = content_router.route(text)
+            routes.append((list(AUTO_DOMAINS) if run_all else domains, scores))
+
+    results = [{} for _ in texts]
+    rows = {domain: set() for domain in AUTO_DOMAINS}
+    for i, (text, (domains, _)) in enumerate(zip(texts, routes)):
+        for domain in domains:
+            cached = prediction_cache.get(domain, MODEL_VERSIONS.get(domain, ""), text)
+            if cached is not None:
+                results[i][domain] = cached
+            else:
+                rows[domain].add(i)
+
+    # Fact checks run while the models are busy
+    pending = {i: start_fact_checks(texts[i]) for i in rows["news"]}
+    # News rows with a timed-out or failed fact check are returned but not cached
+    degraded = set()
+    if rows["review"]:
+        review_rows = sorted(rows["review"])
+        for i, result in zip(review_rows, _predict_review_batch([texts[i] for i in review_rows])):
+            results[i]["review"] = result
+
+    roberta_rows = {d: rows[d] for d in ("news", "job") if rows[d]}
+    if roberta_rows:
+        probs = _classify_shared({d: get_model(d) for d in roberta_rows}, texts, roberta_rows)
+        for i, p in probs.get("job", {}).items():
+            results[i]["job"] = _job_result(texts[i], p)
+        for i, p in probs.get("news", {}).items():
+            fact_checks, complete = collect_fact_checks(pending[i])
+            results[i]["news"] = _news_result(texts[i], p, fact_checks)
+            if not complete:
+                degraded.add(i)
+
+    for domain, indices in rows.items():
+        for i in indices:
+            if domain != "news" or i not in degraded:
+                prediction_cache.put(domain, MODEL_VERSIONS.get(domain, ""), texts[i], results[i][domain])
+    return [
+        {"domains": domains, "route_scores": scores, "results": result}
+        for (domains, scores), result in zip(routes, results)
+    ]
+
+def predict_auto(text, run_all=False):
+    return predict_auto_batch([text], run_all)[0]
+
+# Latest cache_stats() reported by each inference worker, by pid
+worker_cache_stats = {}
+
+def cache_stats():
+    caches = [("prediction", prediction_cache.stats()), ("factcheck", fact_cache.stats())]
+    if near_duplicates is not None:
+        caches.append(("neardup", near_duplicates.stats()))
+    return caches
+
+@metrics.register_collector
+def _model_and_cache_metrics():
+    lines = [
+        "# HELP trustlens_model_loaded Whether a model is resident in this process",
+        "# TYPE trustlens_model_loaded gauge",
+    ]
+    loaded = {entry["name"]: entry for entry in model_registry.loaded()}
+    for name in model_registry.names():
+        lines.append(f'trustlens_model_loaded{{model="{name}"}} {int(name in loaded)}')
+    lines += [
+        "# HELP trustlens_model_resident_bytes Estimated memory held by loaded models",
+        "# TYPE trustlens_model_resident_bytes gauge",
+        f"trustlens_model_resident_bytes {model_registry.total_bytes()}",
+        "# HELP trustlens_cache_events_total Cache lookups by cache and outcome",
+        "# TYPE trustlens_cache_events_total counter",
+    ]
+    totals = {}
+    # Inference workers keep their own caches; add their latest counts to this process's
+    for caches in [cache_stats()] + list(worker_cache_stats.values()):
+        for cache, stats in caches:
+            for event in ("hits", "memory_hits", "disk_hits", "misses", "coalesced"):
+                if event in stats:
+                    totals[cache, event] = totals.get((cache, event), 0) + stats[event]
+    for (cache, event), count in totals.items():
+        lines.append(f'trustlens_cache_events_total{{cache="{cache}",event="{event}"}} {count}')
+    return lines
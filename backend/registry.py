@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+
+from artifacts import memory_usage
+
+
+class ModelRegistry:
+    """Loads models on first use and evicts least-recently-used ones over a memory budget.
+
+    Loaders are registered by name and return `(model, size_bytes)`, or `None`
+    when the artifacts are unavailable. A budget of 0 disables eviction. An
+    optional `version` callable labels what the loader will load next, so a
+    changed artifact can be swapped in with `reload`.
+
+    A failed load is not retried by `get` for `retry_after_s` seconds, so
+    requests for a broken model fail fast instead of each paying for the
+    attempt; `reload` always tries again. `on_swap(name, version)` is called
+    under the registry lock whenever a newly loaded model becomes resident.
+    """
+
+    def __init__(self, budget_bytes=0, retry_after_s=60, on_swap=None):
+        self.budget_bytes = budget_bytes
+        self.retry_after_s = retry_after_s
+        self.on_swap = on_swap
+        self._failed_at = {}
+        self._loaders = {}
+        self._versions = {}
+        self._load_locks = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, version=None):
+        self._loaders[name] = loader
+        self._versions[name] = version or (lambda: "")
+        self._load_locks[name] = threading.Lock()
+
+    def names(self):
+        return list(self._loaders)
+
+    def _touch(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        entry["last_used"] = time.time()
+        self._entries.move_to_end(name)
+        return entry["model"]
+
+    def _backing_off(self, name):
+        # Called with the lock held
+        failed_at = self._failed_at.get(name)
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after_s
+
+    def get(self, name):
+        with self._lock:
+            model = self._touch(name)
+            if model is None and self._backing_off(name):
+                return None
+        if model is not None:
+            return model
+
+        # One loader per model at a time; other models can load in parallel
+        with self._load_locks[name]:
+            with self._lock:
+                model = self._touch(name)
+                if model is None and self._backing_off(name):
+                    # Another request's attempt just failed
+                    return None
+            if model is not None:
+                return model
+
+            entry = self._load(name)
+            if entry is None:
+                return None
+            with self._lock:
+                self._install(name, entry)
+            return entry["model"]
+
+    def _load(self, name):
+        version = self._versions[name]()
+        started = time.perf_counter()
+        loaded = self._loaders[name]()
+        with self._lock:
+            if loaded is None:
+                self._failed_at[name] = time.monotonic()
+                return None
+            self._failed_at.pop(name, None)
+        model, size_bytes = loaded
+        now = time.time()
+        return {
+            "model": model,
+            "version": version,
+            "size_bytes": size_bytes,
+            "load_seconds": time.perf_counter() - started,
+            "memory": memory_usage(),
+            "loaded_at": now,
+            "last_used": now,
+        }
+
+    def reload(self, name, prepare=None):
+        """Load the current artifacts of `name` and swap them in atomically.
+
+        `prepare(model)` runs before the swap, e.g. to warm the new model up.
+        Requests already holding the old model finish on it; it is freed once
+        they drop their references. Returns the new entry's description, or
+        None (keeping the old model) if loading failed.
+        """
+        with self._load_locks[name]:
+            entry = self._load(name)
+            if entry is None:
+                return None
+            if prepare is not None:
+                prepare(entry["model"])
+            with self._lock:
+                self._install(name, entry)
+                return self._describe(name, entry)
+
+    def _install(self, name, entry):
+        # Called with the lock held
+        self._entries[name] = entry
+        self._entries.move_to_end(name)
+        if self.on_swap is not None:
+            self.on_swap(name, entry["version"])
+        self._evict_over_budget(keep=name)
+
+    def version(self, name):
+        """Version label of the resident model, or None if it is not loaded."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry["version"] if entry is not None else None
+
+    def available_version(self, name):
+        return self._versions[name]()
+
+    def _evict_over_budget(self, keep):
+        if self.budget_bytes <= 0:
+            return
+        while self._total_bytes() > self.budget_bytes:
+            victim = next((n for n in self._entries if n != keep), None)
+            if victim is None:
+                break
+            print(f"Evicting {victim} model to stay within memory budget")
+            del self._entries[victim]
+
+    def _total_bytes(self):
+        return sum(entry["size_bytes"] for entry in self._entries.values())
+
+    def evict(self, name):
+        with self._lock:
+            return self._entries.pop(name, None) is not None
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._entries
+
+    def loaded(self):
+        """Describe the currently resident models, least recently used first."""
+        with self._lock:
+            return [self._describe(name, entry) for name, entry in self._entries.items()]
+
+    @staticmethod
+    def _describe(name, entry):
+        memory = entry["memory"]
+        return {
+            "name": name,
+            "version": entry["version"],
+            "size_mb": round(entry["size_bytes"] / (1024 * 1024), 1),
+            "load_seconds": round(entry["load_seconds"], 3),
+            # Whole-process memory right after this version was loaded; the model's own footprint is size_mb
+            "process_rss_mb": round(memory.get("rss", 0) / (1024 * 1024), 1),
+            "process_pss_mb": round(memory["pss"] / (1024 * 1024), 1) if "pss" in memory else None,
+            "loaded_at": entry["loaded_at"],
+            "last_used": entry["last_used"],
+        }
+
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes()
@@ -0,0 +1,56 @@
+import os
+import re
+
+from rule_engine import PhraseMatcher
+
+# Domains to run when no cue matches at all
+AUTO_DEFAULT_DOMAINS = [d.strip() for d in os.getenv("AUTO_DEFAULT_DOMAINS", "news").split(",") if d.strip()]
+
+# Whole-word cues that suggest what kind of content a text is
+ROUTE_CUES = {
+    "news": [
+        "according to", "officials", "government", "minister", "president", "police", "election",
+        "announced", "reported", "breaking", "sources say", "researchers", "study", "percent",
+        "on monday", "on tuesday", "on wednesday", "on thursday", "on friday", "spokesperson",
+    ],
+    "review": [
+        "i bought", "i ordered", "product", "stars", "recommend", "quality", "delivery", "arrived",
+        "works great", "waste of money", "customer service", "battery", "purchase", "my order",
+        "seller", "refund", "packaging", "value for money", "would buy",
+    ],
+    "job": [
+        "hiring", "salary", "apply", "candidate", "candidates", "experience required", "job",
+        "position", "vacancy", "resume", "cv", "interview", "work from home", "per month",
+        "qualifications", "responsibilities", "registration fee", "joining", "ctc",
+    ],
+}
+
+_WORDS = re.compile(r"\w+")
+
+
+class ContentRouter:
+    """Guess the content type of a text from cue phrases, matched on word boundaries in one pass."""
+
+    def __init__(self, cues, default_domains):
+        self.domains = list(cues)
+        self.default_domains = default_domains
+        self._owners = [domain for domain, phrases in cues.items() for _ in phrases]
+        self._matcher = PhraseMatcher(f" {p} " for phrases in cues.values() for p in phrases)
+
+    def scores(self, text):
+        padded = " " + " ".join(_WORDS.findall(text.lower())) + " "
+        counts = dict.fromkeys(self.domains, 0)
+        for i in self._matcher.find(padded):
+            counts[self._owners[i]] += 1
+        return counts
+
+    def route(self, text):
+        """Return `(domains, scores)`: every domain tied for the most cue hits, or the defaults."""
+        counts = self.scores(text)
+        best = max(counts.values())
+        if best == 0:
+            return list(self.default_domains), counts
+        return [d for d in self.domains if counts[d] == best], counts
+
+
+content_router = ContentRouter(ROUTE_CUES, AUTO_DEFAULT_DOMAINS)
@@ -0,0 +1,184 @@
+import json
+import os
+from collections import namedtuple
+from itertools import repeat
+
+import ahocorasick
+import numpy as np
+
+RULES_PATH = os.getenv("RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json"))
+
+# Distinct patterns up to which one substring search per pattern is used instead of an automaton
+SUBSTRING_SCAN_MAX_PATTERNS = int(os.getenv("SUBSTRING_SCAN_MAX_PATTERNS", "64"))
+
+RuleResult = namedtuple("RuleResult", ["score", "reasons", "flags"])
+
+
+class PhraseMatcher:
+    """Multi-pattern substring matcher: `find` returns every pattern that occurs in the text.
+
+    Small pattern sets (all of rules.json) are matched with one C-level
+    substring search per pattern, which beats an automaton at that size.
+    Larger sets use pyahocorasick's Aho-Corasick automaton.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        owners = {}
+        for index, pattern in enumerate(self.patterns):
+            owners.setdefault(pattern, []).append(index)
+        self._automaton = None
+        self._scan = None
+
+        if len(owners) <= SUBSTRING_SCAN_MAX_PATTERNS:
+            self._scan = list(zip(self.patterns, range(len(self.patterns))))
+            return
+        self._automaton = ahocorasick.Automaton()
+        for pattern, indices in owners.items():
+            self._automaton.add_word(pattern, indices)
+        self._automaton.make_automaton()
+
+    def find(self, text):
+        """Return the set of pattern indices that occur anywhere in `text`."""
+        if self._scan is not None:
+            return {i for pattern, i in self._scan if pattern in text}
+        found = set()
+        for _, indices in self._automaton.iter(text):
+            found.update(indices)
+        return found
+
+
+class DomainRules:
+    """All rules of one domain compiled into a single matcher."""
+
+    def __init__(self, spec):
+        self.rules = spec.get("rules", [])
+        self.flags = spec.get("flags", {})
+
+        # Pattern indices per phrase rule (with the phrase to report) and per flag
+        patterns = []
+        self._rule_patterns = {}
+        for rule in self.rules:
+            if rule["type"] == "phrases":
+                self._rule_patterns[rule["id"]] = [(len(patterns) + i, phrase) for i, phrase in enumerate(rule["phrases"])]
+                patterns.extend(phrase.lower() for phrase in rule["phrases"])
+        self._flag_patterns = []
+        for flag, phrases in self.flags.items():
+            self._flag_patterns.append((flag, frozenset(range(len(patterns), len(patterns) + len(phrases)))))
+            patterns.extend(phrase.lower() for phrase in phrases)
+        self._matcher = PhraseMatcher(patterns)
+
+    def _flags(self, found):
+        return {flag for flag, indices in self._flag_patterns if not indices.isdisjoint(found)}
+
+    def evaluate(self, text):
+        found = self._matcher.find(text.lower())
+        words = None
+
+        score = 0.0
+        reasons = []
+        for rule in self.rules:
+            kind = rule["type"]
+            contribution = 0.0
+            matches = []
+            if kind == "phrases":
+                matches = [p for i, p in self._rule_patterns[rule["id"]] if i in found]
+                if matches:
+                    contribution = min(rule["max"], len(matches) * rule["weight"])
+            else:
+                if words is None:
+                    words = text.split()
+                if kind == "min_words":
+                    fired = len(words) < rule["threshold"]
+                elif kind == "char_count":
+                    fired = text.count(rule["char"]) >= rule["threshold"]
+                elif kind == "caps_word":
+                    fired = any(len(w) >= rule["min_length"] and w.isupper() for w in words)
+                elif kind == "repetition":
+                    fired = len(set(words)) < len(words) * rule["min_unique_ratio"]
+                else:
+                    raise ValueError(f"Unknown rule type: {kind}")
+                if fired:
+                    contribution = rule["contribution"]
+
+            if contribution:
+                score += contribution
+                reasons.append(rule["reason"].format(matches=", ".join(matches), contribution=contribution))
+
+        return RuleResult(score, reasons, self._flags(found))
+
+    def features(self, texts):
+        """Compute every text feature the rules need as NumPy columns for the whole batch.
+
+        Per-text work runs through C-level map() calls rather than Python
+        loops, and word features are only computed when a rule needs them.
+        """
+        n = len(texts)
+        hits = list(map(self._matcher.find, map(str.lower, texts)))
+        columns = {}
+        kinds = {rule["type"] for rule in self.rules}
+        if kinds & {"min_words", "caps_word", "repetition"}:
+            words = list(map(str.split, texts))
+            columns["word_count"] = np.fromiter(map(len, words), dtype=np.int64, count=n)
+            if "repetition" in kinds:
+                columns["unique_words"] = np.fromiter(map(len, map(set, words)), dtype=np.int64, count=n)
+        for rule in self.rules:
+            kind = rule["type"]
+            if kind == "char_count":
+                columns[f"count:{rule['char']}"] = np.fromiter(map(str.count, texts, repeat(rule["char"])), dtype=np.int64, count=n)
+            elif kind == "caps_word":
+                min_length = rule["min_length"]
+                # Only texts with an upper- or titlecase letter somewhere can contain a shouted word
+                candidates = np.flatnonzero(~np.fromiter(map(str.islower, texts), dtype=bool, count=n))
+                caps = np.zeros(n, dtype=bool)
+                for i in candidates:
+                    caps[i] = any(len(x) >= min_length and x.isupper() for x in words[i])
+                columns[f"caps:{min_length}"] = caps
+        return columns, hits
+
+    def evaluate_batch(self, texts):
+        """Column-wise `evaluate` over a batch; returns the same RuleResult for every text."""
+        if all(rule["type"] == "phrases" for rule in self.rules):
+            # Nothing to compute column-wise; the per-text path has less overhead
+            return list(map(self.evaluate, texts))
+        n = len(texts)
+        columns, hits = self.features(texts)
+        scores = np.zeros(n)
+        reasons = [[] for _ in range(n)]
+        for rule in self.rules:
+            kind = rule["type"]
+            if kind == "phrases":
+                patterns = self._rule_patterns[rule["id"]]
+                indices = frozenset(i for i, _ in patterns)
+                for i in range(n):
+                    if indices.isdisjoint(hits[i]):
+                        continue
+                    matches = [p for index, p in patterns if index in hits[i]]
+                    contribution = min(rule["max"], len(matches) * rule["weight"])
+                    scores[i] += contribution
+                    reasons[i].append(rule["reason"].format(matches=", ".join(matches), contribution=contribution))
+                continue
+
+            if kind == "min_words":
+                fired = columns["word_count"] < rule["threshold"]
+            elif kind == "char_count":
+                fired = columns[f"count:{rule['char']}"] >= rule["threshold"]
+            elif kind == "caps_word":
+                fired = columns[f"caps:{rule['min_length']}"]
+            elif kind == "repetition":
+                fired = columns["unique_words"] < columns["word_count"] * rule["min_unique_ratio"]
+            else:
+                raise ValueError(f"Unknown rule type: {kind}")
+            contribution = rule["contribution"]
+            scores[fired] += contribution
+            reason = rule["reason"].format(matches="", contribution=contribution)
+            for i in np.flatnonzero(fired):
+                reasons[i].append(reason)
+
+        return [RuleResult(float(score), r, self._flags(h)) for score, r, h in zip(scores, reasons, hits)]
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    return {domain: DomainRules(domain_spec) for domain, domain_spec in spec.items()}
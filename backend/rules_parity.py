@@ -0,0 +1,152 @@
+import argparse
+import random
+import sys
+import time
+
+import rule_engine
+
+# The keyword rules as they were before rules.json, kept verbatim as the reference
+NEWS_KEYWORDS = [
+    "cure cancer", "miracle", "aliens", "alien", "secret", "government hiding",
+    "underground city", "immortality", "teleported", "inside source", "conspiracy",
+    "cover up", "truth they don't want you to know", "shocking discovery"
+]
+REVIEW_PHRASES = [
+    "best product ever", "perfect", "absolutely perfect",
+    "life changing", "amazing amazing", "incredible deal",
+    "buy now", "highly recommend to everyone"
+]
+JOB_TERMS = [
+    "registration fee", "send bank details", "earn", "₹", "limited slots",
+    "no experience needed", "work from home money", "quick money", "investment",
+    "hiring immediately", "urgent hiring"
+]
+SCIENCE_KEYWORDS = [
+    "research", "isro", "nasa", "study", "scientists",
+    "experiment", "analysis", "data", "mission"
+]
+
+
+def reference_news(text):
+    found = [kw for kw in NEWS_KEYWORDS if kw in text.lower()]
+    if not found:
+        return 0.0, []
+    contribution = min(0.4, len(found) * 0.15)
+    return contribution, [f"Suspicious keywords detected: {', '.join(found)} (+{contribution:.0%} risk)"]
+
+
+def reference_review(text):
+    text_lower = text.lower()
+    score = 0.0
+    reasons = []
+    if len(text.split()) < 8:
+        score += 0.25
+        reasons.append(f"Review is unusually short (+{0.25:.0%} risk)")
+    if text.count("!") >= 3:
+        score += 0.35
+        reasons.append(f"Multiple exclamation marks detected (+{0.35:.0%} risk)")
+    found = [p for p in REVIEW_PHRASES if p in text_lower]
+    if found:
+        score += 0.40
+        reasons.append(f"Exaggerated phrases: {', '.join(found)} (+{0.40:.0%} risk)")
+    words = text.split()
+    if any(len(w) > 3 and w.isupper() for w in words):
+        score += 0.30
+        reasons.append(f"Contains ALL CAPS shouting (+{0.30:.0%} risk)")
+    if len(set(words)) < len(words) * 0.4:
+        score += 0.25
+        reasons.append(f"Unnatural repetition in review (+{0.25:.0%} risk)")
+    return score, reasons
+
+
+def reference_job(text):
+    found = [t for t in JOB_TERMS if t in text.lower()]
+    if not found:
+        return 0.0, []
+    contribution = min(0.5, len(found) * 0.20)
+    return contribution, [f"Scam indicators: {', '.join(found)} (+{contribution:.0%} risk)"]
+
+
+REFERENCES = {"news": reference_news, "review": reference_review, "job": reference_job}
+
+FILLER = (
+    "the a report city council week market team product service company people data year price "
+    "local new official quality delivery customer experience role salary office remote learn "
+    "secretary alienate perfectly earnest missionary studying"
+).split()
+NOISE = ["!", "!!", "!!!", "WOW", "GREAT", "OK", "₹500", "Nasa", "ISRO", "Miracle", "BUY NOW", "Secret."]
+
+
+def random_texts(count, seed):
+    rng = random.Random(seed)
+    phrases = NEWS_KEYWORDS + REVIEW_PHRASES + JOB_TERMS + SCIENCE_KEYWORDS
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.choice([1, 3, 6, 10, 25, 80])):
+            roll = rng.random()
+            if roll < 0.15:
+                token = rng.choice(phrases)
+                token = token.upper() if rng.random() < 0.2 else token.capitalize() if rng.random() < 0.3 else token
+            elif roll < 0.25:
+                token = rng.choice(NOISE)
+            elif roll < 0.35 and tokens:
+                token = rng.choice(tokens)
+            else:
+                token = rng.choice(FILLER)
+            tokens.append(token)
+        texts.append(rng.choice([" ", "  ", "\n"]).join(tokens))
+    return texts
+
+
+def check(rules, texts):
+    mismatches = 0
+    for domain, reference in REFERENCES.items():
+        batch = rules[domain].evaluate_batch(texts)
+        for text, batched in zip(texts, batch):
+            expected = reference(text)
+            single = rules[domain].evaluate(text)
+            for result in (single, batched):
+                ok = abs(result.score - expected[0]) < 1e-9 and result.reasons == expected[1]
+                if domain == "news":
+                    ok = ok and ("science" in result.flags) == any(w in text.lower() for w in SCIENCE_KEYWORDS)
+                if not ok:
+                    mismatches += 1
+                    if mismatches <= 5:
+                        print(f"  {domain} mismatch on {text[:80]!r}: {result} != {expected}")
+    return mismatches
+
+
+def per_text_ms(fn, texts):
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - started) / len(texts) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the compiled rule engine against the original keyword rules.")
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = random_texts(args.texts, args.seed)
+    # Force each matcher implementation in turn
+    matchers = {"substring scan": rule_engine.SUBSTRING_SCAN_MAX_PATTERNS, "pyahocorasick": 0}
+
+    failed = False
+    for label, max_patterns in matchers.items():
+        rule_engine.SUBSTRING_SCAN_MAX_PATTERNS = max_patterns
+        rules = rule_engine.load_rules()
+        mismatches = check(rules, texts)
+        failed = failed or mismatches > 0
+        timings = ", ".join(
+            f"{domain} {per_text_ms(rules[domain].evaluate, texts):.4f} ms (reference {per_text_ms(REFERENCES[domain], texts):.4f} ms)"
+            for domain in REFERENCES
+        )
+        print(f"{label}: {mismatches} mismatches over {len(texts)} texts; {timings}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ from pydantic import BaseModel
 class TextRequest(BaseModel):
     text: str
 
+class BatchTextRequest(BaseModel):
+    texts: list[str]
+
 class UserCreate(BaseModel):
     username: str
     email: str | None = None
@@ -23,3 +26,29 @@ class PredictionResponse(BaseModel):
     confidence: float
     explanation: str | None = None
     reasons: list[str] = []
+
+class HistoryItem(BaseModel):
+    id: int
+    domain: str
+    text_hash: str
+    label: str
+    confidence: float
+    reasons: list[str] = []
+    created_at: str
+
+class HistoryPage(BaseModel):
+    items: list[HistoryItem]
+    next_cursor: int | None = None
+
+class AutoRequest(BaseModel):
+    text: str
+    run_all: bool = False
+
+class AutoBatchRequest(BaseModel):
+    texts: list[str]
+    run_all: bool = False
+
+class AutoPredictionResponse(BaseModel):
+    domains: list[str]
+    route_scores: dict[str, int]
+    results: dict[str, PredictionResponse]
@@ -0,0 +1,78 @@
+import numpy as np
+
+MAX_SEQUENCE_LENGTH = 512
+# Windows scored per forward pass while early exit is possible, so a decisive window stops the rest
+EARLY_EXIT_WINDOWS = 4
+
+
+def token_windows(ids, size, overlap):
+    """Split token ids into windows of at most `size` tokens, consecutive windows sharing `overlap` tokens."""
+    if len(ids) <= size:
+        return [ids]
+    step = max(1, size - overlap)
+    windows = []
+    for start in range(0, len(ids), step):
+        windows.append(ids[start:start + size])
+        if start + size >= len(ids):
+            break
+    return windows
+
+
+def with_special_tokens(tokenizer, ids):
+    # <s> ids </s> for RoBERTa; not every tokenizer version has build_inputs_with_special_tokens
+    return [tokenizer.cls_token_id] + list(ids) + [tokenizer.sep_token_id]
+
+
+def score_sequences(classifier, sequences, batch_size):
+    """Score encoded sequences in length-sorted batches, each padded only to its own longest member."""
+    order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+    probs = [None] * len(sequences)
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        inputs = classifier.tokenizer.pad({"input_ids": [sequences[i] for i in idx]}, return_tensors="pt")
+        for i, p in zip(idx, classifier.runner.predict_proba(inputs)):
+            probs[i] = p
+    return probs
+
+
+def _combine(window_probs, fake_score, aggregate):
+    if aggregate == "mean":
+        return np.mean(np.array(window_probs), axis=0).tolist()
+    # "max": the window that looks most fake decides
+    return max(window_probs, key=fake_score)
+
+
+def classify_long(classifier, texts, fake_score, batch_size, overlap=128, aggregate="max", early_exit=1.0):
+    """Score full documents by sliding windows over their tokens.
+
+    Texts that fit in one sequence are scored together. Longer texts are split
+    into overlapping windows whose probabilities are combined with
+    `aggregate` ("max" or "mean"). Scoring of a document stops as soon as one
+    window's fake score reaches `early_exit`; while that is possible windows
+    are scored `EARLY_EXIT_WINDOWS` at a time.
+    """
+    tokenizer = classifier.tokenizer
+    size = MAX_SEQUENCE_LENGTH - tokenizer.num_special_tokens_to_add()
+    encoded = tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+
+    short = [i for i, ids in enumerate(encoded) if len(ids) <= size]
+    results = [None] * len(texts)
+    sequences = [with_special_tokens(tokenizer, encoded[i]) for i in short]
+    for i, p in zip(short, score_sequences(classifier, sequences, batch_size)):
+        results[i] = p
+
+    for i, ids in enumerate(encoded):
+        if results[i] is not None:
+            continue
+        windows = [with_special_tokens(tokenizer, w) for w in token_windows(ids, size, overlap)]
+        group = min(batch_size, EARLY_EXIT_WINDOWS) if early_exit < 1 else batch_size
+        window_probs = []
+        for start in range(0, len(windows), group):
+            batch_probs = score_sequences(classifier, windows[start:start + group], group)
+            window_probs.extend(batch_probs)
+            decisive = [p for p in batch_probs if fake_score(p) >= early_exit]
+            if decisive:
+                window_probs = decisive
+                break
+        results[i] = _combine(window_probs, fake_score, aggregate)
+    return results
@@ -0,0 +1,43 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+import workers
+
+
+def worker_pid(_):
+    return os.getpid()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that predictions keep working after an inference worker is killed.")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--kills", type=int, default=2)
+    args = parser.parse_args()
+
+    workers.INFERENCE_WORKERS = args.workers
+    workers.PREDICT_FUNCTIONS["pid"] = (worker_pid, None)
+    workers.start_pool()
+    failed = False
+    try:
+        for attempt in range(args.kills):
+            victim = workers.run_prediction("pid", None)
+            os.kill(victim, signal.SIGKILL)
+            # Let the pool notice; the next call must still be answered, by a live worker
+            time.sleep(0.5)
+            try:
+                answered_by = workers.run_prediction("pid", None)
+                ok = answered_by != victim
+            except Exception as e:
+                answered_by, ok = repr(e), False
+            failed = failed or not ok
+            print(f"kill {attempt + 1}: worker {victim} killed, next prediction answered by {answered_by}: {'ok' if ok else 'FAILED'}")
+    finally:
+        workers.stop_pool()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import torch
+from fastapi import HTTPException
+
+import metrics
+import predictors
+
+# Number of inference processes (0 = run predictions in the API process)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+# torch intra-op threads per worker (0 = the worker's share of the cores)
+INFERENCE_THREADS_PER_WORKER = int(os.getenv("INFERENCE_THREADS_PER_WORKER", "0"))
+
+PREDICT_FUNCTIONS = {
+    "news": (predictors.predict_news, predictors.predict_news_batch),
+    "review": (predictors.predict_review, predictors.predict_review_batch),
+    "job": (predictors.predict_job, predictors.predict_job_batch),
+    "auto": (predictors.predict_auto, predictors.predict_auto_batch),
+    "auto_all": (partial(predictors.predict_auto, run_all=True), partial(predictors.predict_auto_batch, run_all=True)),
+    # Model stage only, for the streaming news endpoint
+    "news_model": (predictors.news_probabilities, None),
+}
+
+_pool = None
+# Serialises replacing a pool that broke because a worker died
+_pool_lock = threading.Lock()
+# Reload requests per model, shared with the workers (see predictors.start_model_watcher)
+_generations = None
+
+
+def _init_worker(counter, lock, workers, threads, generations):
+    with lock:
+        index = counter.value
+        counter.value += 1
+
+    # Pin each worker to its own slice of the cores
+    cpus = sorted(os.sched_getaffinity(0))
+    per_worker = max(1, len(cpus) // workers)
+    cores = cpus[index * per_worker:(index + 1) * per_worker] or cpus
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads or len(cores))
+    predictors.preload_models(predictors.model_registry.names())
+    predictors.start_model_watcher(generations)
+    print(f"Inference worker {index} (pid {os.getpid()}) pinned to cores {cores[0]}-{cores[-1]}")
+
+
+def _telemetry():
+    # /metrics is served by the API process, so stage timings, counters and cache counts travel back with results
+    return os.getpid(), metrics.export_deltas(), predictors.cache_stats()
+
+
+def _run(domain, batch, payload):
+    single, many = PREDICT_FUNCTIONS[domain]
+    try:
+        return "ok", (many if batch else single)(payload), _telemetry()
+    except HTTPException as e:
+        # Sent back as plain values; HTTPException does not round-trip through pickle
+        return "http_error", (e.status_code, e.detail), _telemetry()
+
+
+def start_pool():
+    """Fork the inference workers after loading every model so they share weights copy-on-write."""
+    global _pool, _generations
+    if INFERENCE_WORKERS <= 0 or _pool is not None:
+        return
+
+    # Warm-up happens in the workers; running torch here before forking can hang the children
+    predictors.preload_models(predictors.model_registry.names(), warmup=False)
+
+    _generations = multiprocessing.get_context("fork").Array("i", len(predictors.model_registry.names()))
+    # Fork every worker now, before startup() starts the history writer and model watcher threads
+    _pool = _new_pool()
+    print(f"Started {INFERENCE_WORKERS} inference workers")
+
+
+def _new_pool():
+    ctx = multiprocessing.get_context("fork")
+    counter = ctx.Value("i", 0)
+    lock = ctx.Lock()
+    pool = ProcessPoolExecutor(
+        max_workers=INFERENCE_WORKERS,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(counter, lock, INFERENCE_WORKERS, INFERENCE_THREADS_PER_WORKER, _generations),
+    )
+    for future in [pool.submit(os.getpid) for _ in range(INFERENCE_WORKERS)]:
+        future.result()
+    return pool
+
+
+def _replace_broken_pool(broken):
+    """Swap in a fresh pool for `broken` (once, however many requests saw it break) and return the current pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            print("An inference worker died; restarting the worker pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            _pool = _new_pool()
+        return _pool
+
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def request_reload(name):
+    """Ask every worker to reload `name`; each swaps it in on its next watcher tick. Returns the worker count."""
+    if _pool is None:
+        return 0
+    with _generations.get_lock():
+        _generations[predictors.model_registry.names().index(name)] += 1
+    return INFERENCE_WORKERS
+
+
+def _dispatch(domain, batch, payload):
+    if _pool is None:
+        single, many = PREDICT_FUNCTIONS[domain]
+        return (many if batch else single)(payload)
+
+    pool = _pool
+    try:
+        try:
+            status, value, (pid, deltas, caches) = pool.submit(_run, domain, batch, payload).result()
+        except BrokenProcessPool:
+            # A worker was killed (e.g. by the OOM killer); retry once on a new pool
+            status, value, (pid, deltas, caches) = _replace_broken_pool(pool).submit(_run, domain, batch, payload).result()
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail="Inference workers are restarting, try again shortly")
+    metrics.merge(deltas)
+    predictors.worker_cache_stats[pid] = caches
+    if status == "http_error":
+        status_code, detail = value
+        raise HTTPException(status_code=status_code, detail=detail)
+    return value
+
+
+def run_prediction(domain, text):
+    return _dispatch(domain, False, text)
+
+
+def run_batch_prediction(domain, texts):
+    return _dispatch(domain, True, texts)
+
+
+def stream_news_prediction(text):
+    """Progressive news events; only the model forward pass goes to a worker, fact checks run here."""
+    return predictors.predict_news_stream(text, probabilities=lambda t: _dispatch("news_model", False, t))